@@ -0,0 +1,287 @@
+"""
+Search latency benchmark.
+
+Generates synthetic path corpora (deep folder trees with shared prefixes) into throwaway
+databases and times a fixed query mix for each search mode, issued the way DatabaseReader
+issues it: the first page through get_files_by_search, then, outside fuzzy mode and when
+the page did not hold every result, the refine candidates through get_search_candidates.
+Every mode runs in its own process so peak RSS is reported per engine.
+Runs headless; only QtCore is imported.
+
+    python benchmark.py
+    python benchmark.py --sizes 100000 1000000 --modes trigram fuzzy --repeats 10
+"""
+
+import argparse
+import datetime
+import json
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from file_search.utils.database import DatabaseManager
+from file_search.utils.db_worker import REFINE_CANDIDATE_LIMIT, SEARCH_PAGE_SIZE
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+MODES = ['like', 'trigram', 'fts', 'fuzzy']
+REPEATS = 20
+INSERT_BATCH = 50000
+
+ROOTS = [
+    "C:\\Users\\bench\\OneDrive - Company\\Documents",
+    "C:\\Users\\bench\\Downloads",
+    "C:\\Projects",
+    "D:\\Archive",
+    "\\\\fileserver\\shared\\Departments",
+]
+FOLDER_WORDS = [
+    'projects', 'archive', 'reports', 'finance', 'clients', 'shared', 'drafts', '2021', '2022',
+    '2023', '2024', 'src', 'assets', 'docs', 'meeting notes', 'templates', 'invoices', 'hr',
+    'marketing', 'research',
+]
+NAME_WORDS = [
+    'report', 'budget', 'summary', 'invoice', 'notes', 'draft', 'final', 'presentation', 'contract',
+    'plan', 'analysis', 'minutes', 'proposal', 'review', 'data', 'export', 'backup', 'scan',
+    'photo', 'readme',
+]
+EXTENSIONS = ['pdf', 'docx', 'xlsx', 'pptx', 'txt', 'csv', 'png', 'jpg', 'py', 'msg']
+MAX_DEPTH = 12
+
+QUERY_MIX = [
+    'r',  # single character: no index can narrow it
+    'pdf',
+    'report',
+    'budget xlsx',
+    'clients final pdf',
+    'finance 2023 summary',
+    'meeting notes minutes',
+    'report_budget_12',
+    'projects\\archive',
+    'zzq_no_match',
+]
+
+
+def generate_paths(count: int, seed: int = 0) -> Iterator[tuple[str, int, int, str]]:
+    """Yield (file_path, file_size, mtime_ns, scan_folder) rows for a synthetic tree."""
+    rng = random.Random(seed)
+    folders = [(root, root, 0) for root in ROOTS]  # (path, scan folder, depth)
+    for _ in range(max(count // 25, 1)):
+        parent, scan_folder, depth = rng.choice(folders)
+        if depth >= MAX_DEPTH:
+            parent, scan_folder, depth = rng.choice(folders[: len(ROOTS)])
+        name = rng.choice(FOLDER_WORDS)
+        if rng.random() < 0.5:
+            name = f"{name}_{rng.randint(1, 99)}"
+        folders.append((f"{parent}\\{name}", scan_folder, depth + 1))
+
+    start = datetime.datetime(2019, 1, 1)
+    for i in range(count):
+        folder, scan_folder, _ = rng.choice(folders)
+        name = f"{rng.choice(NAME_WORDS)}_{rng.choice(NAME_WORDS)}_{i}.{rng.choice(EXTENSIONS)}"
+        modified = start + datetime.timedelta(seconds=rng.randint(0, 5 * 365 * 24 * 3600))
+        yield (
+            f"{folder}\\{name}",
+            rng.randint(0, 50_000_000),
+            int(modified.timestamp()) * 1_000_000_000,
+            scan_folder,
+        )
+
+
+def build_corpus(db_path: Path, count: int, seed: int = 0):
+    """Create a database at db_path holding count synthetic files and a few favorites."""
+    db_manager = DatabaseManager(search_mode='like', db_path=db_path)
+    favorites = []
+    with db_manager.engine.begin() as conn:  # type: ignore
+        batch = []
+        for n, row in enumerate(generate_paths(count, seed)):
+            batch.append(row)
+            if n % 1000 == 0:
+                favorites.append((row[0],))
+            if len(batch) >= INSERT_BATCH:
+                conn.exec_driver_sql(
+                    "INSERT INTO files (file_path, file_size, mtime_ns, scan_folder) VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+                batch = []
+        if batch:
+            conn.exec_driver_sql(
+                "INSERT INTO files (file_path, file_size, mtime_ns, scan_folder) VALUES (?, ?, ?, ?)",
+                batch,
+            )
+        conn.exec_driver_sql("INSERT INTO favorites (file_path) VALUES (?)", favorites)
+    db_manager.close_database()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None if the platform does not report it."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def run_engine(db_path: Path, mode: str, repeats: int, use_cache: bool) -> dict:
+    """Time QUERY_MIX against one search mode; runs inside its own process."""
+    start = time.perf_counter()
+    db_manager = DatabaseManager(search_mode=mode, db_path=db_path)  # type: ignore
+    # The database worker loads the path catalog and the in-memory index at startup
+    db_manager.load_path_catalog()
+    setup_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db_manager.get_files_by_search(QUERY_MIX[1], SEARCH_PAGE_SIZE + 1)
+    warmup_seconds = time.perf_counter() - start
+
+    samples: list[float] = []
+    candidate_times: list[float] = []
+    per_query: dict[str, list[float]] = {q: [] for q in QUERY_MIX}
+    candidate_samples: dict[str, list[float]] = {}
+    result_counts = {}
+    for _ in range(repeats):
+        for query in QUERY_MIX:
+            if not use_cache:
+                db_manager.result_cache.invalidate()
+            start = time.perf_counter()
+            rows = db_manager.get_files_by_search(query, SEARCH_PAGE_SIZE + 1)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            samples.append(elapsed_ms)
+            per_query[query].append(elapsed_ms)
+            result_counts[query] = len(rows)
+            # Fuzzy ranking reorders results, so the reader keeps no candidate set in that mode
+            if db_manager.search_mode != 'fuzzy' and len(rows) > SEARCH_PAGE_SIZE:
+                start = time.perf_counter()
+                db_manager.get_search_candidates(query, REFINE_CANDIDATE_LIMIT)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                candidate_times.append(elapsed_ms)
+                candidate_samples.setdefault(query, []).append(elapsed_ms)
+
+    db_manager.close_database()
+    return {
+        'mode': db_manager.search_mode,
+        'setup_seconds': setup_seconds,
+        'warmup_seconds': warmup_seconds,
+        'latency_ms': percentiles(samples),
+        'candidates_ms': percentiles(candidate_times) if candidate_times else None,
+        'per_query_p50_ms': {q: statistics.median(v) for q, v in per_query.items()},
+        'candidates_p50_ms': {q: statistics.median(v) for q, v in candidate_samples.items()},
+        'result_counts': result_counts,
+        'cache': db_manager.result_cache.stats(),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def run_engine_subprocess(db_path: Path, mode: str, args) -> Optional[dict]:
+    command = [
+        sys.executable, __file__, '--run-engine', str(db_path), mode,
+        '--repeats', str(args.repeats),
+    ]
+    if args.cache:
+        command.append('--cache')
+    result = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).parent)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    print(f"  {mode} failed:", result.stderr.strip().splitlines()[-1:] or result.returncode)
+    return None
+
+
+def format_bytes(size: Optional[int]) -> str:
+    return "n/a" if size is None else f"{size / 1024 / 1024:.0f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', action='store_true', help="keep the result cache enabled between repeats")
+    parser.add_argument('--workdir', type=Path, help="where to create the corpus databases (kept afterwards)")
+    parser.add_argument('--json', type=Path, help="also write all results to this file")
+    parser.add_argument('--run-engine', nargs=2, metavar=('DB_PATH', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_engine:
+        db_path, mode = args.run_engine
+        result = run_engine(Path(db_path), mode, args.repeats, args.cache)
+        print('RESULT ' + json.dumps(result))
+        return
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix='file_search_bench_'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = []
+    try:
+        for size in args.sizes:
+            db_path = workdir / f"bench_{size}_{args.seed}.db"
+            if not db_path.exists():
+                print(f"Generating {size:,} paths...")
+                start = time.perf_counter()
+                build_corpus(db_path, size, args.seed)
+                print(f"  built in {time.perf_counter() - start:.1f}s ({db_path.stat().st_size / 1024 / 1024:.0f} MB on disk)")
+
+            for mode in args.modes:
+                result = run_engine_subprocess(db_path, mode, args)
+                if result is None:
+                    continue
+                result['size'] = size
+                results.append(result)
+                latency = result['latency_ms']
+                candidates = "n/a" if result['candidates_ms'] is None else f"{result['candidates_ms']['p50']:.1f} ms"
+                print(
+                    f"  {size:>9,} {result['mode']:<8} "
+                    f"p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms  "
+                    f"candidates p50 {candidates:>11}  "
+                    f"setup {result['setup_seconds']:6.1f}s  first search {result['warmup_seconds']:6.1f}s  "
+                    f"peak RSS {format_bytes(result['peak_rss_bytes'])}"
+                )
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
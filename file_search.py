@@ -1,4 +1,8 @@
+import multiprocessing
 from file_search.app import main
 
 
-main()
\ No newline at end of file
+# Guarded so scan processes, which import this module when spawned, don't start the app
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
\ No newline at end of file
@@ -21,7 +21,10 @@
 #     # Run the application
 #     result = app.exec()
 
+import multiprocessing
 from .app import main
 
 if __name__ == '__main__':
+    # Lets a frozen build run the scan processes it spawns
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
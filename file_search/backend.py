@@ -1,13 +1,19 @@
-from PySide6.QtCore import QObject, Slot, Signal, QThread, Property, QJsonDocument
+from PySide6.QtCore import QObject, Slot, Signal, QThread, QTimer, Property, QJsonDocument
 from PySide6.QtQml import QmlElement, QmlSingleton
 
 from .utils.scanner import FileScanner
 from .utils.file_model import FileListModel
-from .utils.db_worker import DatabaseWorker
+from .utils.db_worker import SEARCH_PAGE_SIZE, DatabaseReader, DatabaseWorker
+from .utils.telemetry import get_scan_telemetry
 import uuid
 
 QML_IMPORT_NAME = "fsearch"
 QML_IMPORT_MAJOR_VERSION = 1
+
+# How often recorded file opens are written to the database
+ACCESS_FLUSH_INTERVAL_MS = 30000
+# How often the database's write-ahead log is checkpointed
+WAL_CHECKPOINT_INTERVAL_MS = 60000
 # QQmlDebuggingEnabler.enableDebugging(True)
 
 
@@ -15,18 +21,24 @@ QML_IMPORT_MAJOR_VERSION = 1
 @QmlSingleton
 class Backend(QObject):
     requestFavoritesSignal = Signal()
-    searchSignal = Signal(str, int)
-    startScanSignal = Signal()
+    searchSignal = Signal(str, int, int)  # search term, page size, generation
+    fetchMoreSignal = Signal(int)  # search generation
+    startScanSignal = Signal(bool)  # scan every folder, not only those due
     cleanupSignal = Signal()
+    loadCatalogSignal = Signal()
+    flushAccessSignal = Signal()
+    checkpointSignal = Signal()
     scanStatusChanged = Signal()
     responseReady = Signal(str, 'QJsonObject')  # type: ignore # requestId, result
     procReq = Signal(str, dict)  # type: ignore # requestId, result
+    readReq = Signal(str, dict)  # type: ignore # requestId, result
     errorOccurred = Signal(str, dict)  # requestId, error
 
     def __init__(self, parent=None):
         super().__init__(parent)
         print("created backend Instance")
         self._scan_status = ''
+        self._search_term = ''
         self._scanner = FileScanner()
         self._pending_requests = {}
         self._file_list_model: FileListModel = FileListModel() # type: ignore
@@ -34,38 +46,98 @@ class Backend(QObject):
         self._dbworker_thread = QThread()
         self._dbworker.moveToThread(self._dbworker_thread)
         self._dbworker_thread.start()
+        # Searches and other reads get their own thread, so they never queue behind scan batches
+        self._dbreader = DatabaseReader(self._dbworker.db_manager)
+        self._dbreader_thread = QThread()
+        self._dbreader.moveToThread(self._dbreader_thread)
+        self._dbreader_thread.start()
 
         self._scanner.scanSignal.connect(self.on_scan_status_update)
         self._scanner.batch_scan_to_send.connect(self._dbworker.batch_file_table_update)
+        self._scanner.rescanRequested.connect(self._dbworker.getFoldersForScan)
+        self._scanner.root_scan_finished.connect(self._dbworker.record_root_scan)
+        self._scanner.scan_telemetry_ready.connect(self._dbworker.record_scan_telemetry)
 
         self._dbworker.foldersToScan.connect(self._scanner.run_scan)
         self._dbworker.batchUpdateCompleted.connect(self._scanner._on_batch_completed)
         self._dbworker.operationError.connect(self._scanner._on_db_error)
 
-        self.searchSignal.connect(self._dbworker.search_files)
-        self.requestFavoritesSignal.connect(self._dbworker.get_favorites)
+        self.searchSignal.connect(self._dbreader.search_files)
+        self.fetchMoreSignal.connect(self._dbreader.fetch_more_results)
+        self._file_list_model.fetchMoreRequested.connect(self.on_fetch_more_requested)
+        self.requestFavoritesSignal.connect(self._dbreader.get_favorites)
         self.startScanSignal.connect(self._dbworker.getFoldersForScan)
         self.cleanupSignal.connect(self._dbworker.cleanup_database_connections)
         self.procReq.connect(self._dbworker.process_request)
+        self.readReq.connect(self._dbreader.process_request)
+        self.flushAccessSignal.connect(self._dbworker.flush_file_accesses)
+        self.loadCatalogSignal.connect(self._dbworker.load_path_catalog)
+        self.checkpointSignal.connect(self._dbworker.checkpoint_wal)
+
+        self._access_flush_timer = QTimer(self)
+        self._access_flush_timer.setInterval(ACCESS_FLUSH_INTERVAL_MS)
+        self._access_flush_timer.timeout.connect(self.flushAccessSignal)
+        self._access_flush_timer.start()
+
+        self._checkpoint_timer = QTimer(self)
+        self._checkpoint_timer.setInterval(WAL_CHECKPOINT_INTERVAL_MS)
+        self._checkpoint_timer.timeout.connect(self.checkpointSignal)
+        self._checkpoint_timer.start()
 
         self._dbworker.responseReady.connect(self.respReadySlot)
         self._dbworker.errorOccurred.connect(self.errOccuredSlot)
+        self._dbworker.tableChanged.connect(self.on_table_changed)
+        self._dbreader.responseReady.connect(self.respReadySlot)
+        self._dbreader.errorOccurred.connect(self.errOccuredSlot)
 
-        self._dbworker.searchResultsReady.connect(self._file_list_model.on_search_results)
-        self._dbworker.favoritesReady.connect(self._file_list_model.on_favorites_ready)
+        self._dbreader.searchResultsReady.connect(self.on_search_results)
+        self._dbreader.moreResultsReady.connect(self.on_more_results)
+        self._dbreader.favoritesReady.connect(self._file_list_model.on_favorites_ready)
         self._dbworker.operationError.connect(self._file_list_model.on_operation_error)
+        self._dbreader.operationError.connect(self._file_list_model.on_operation_error)
+
+        # Load the path catalog on the worker thread once everything is connected, if the search mode uses it
+        self.loadCatalogSignal.emit()
 
 
     @Slot(str)
     def searchFiles(self, search_term: str):
         """Search for files and update the model (async)."""
+        # Supersedes every search still queued or running on the database reader
+        generation = self._dbreader.search_generation.next()
+        self._search_term = search_term
         if not search_term.strip():
             # When search is empty, load favorites instead of clearing
             self.requestFavoritesSignal.emit()
             return
 
         # Request search from database worker (async)
-        self.searchSignal.emit(search_term, 1000)
+        self.searchSignal.emit(search_term, SEARCH_PAGE_SIZE, generation)
+
+    @Slot(str)
+    def on_table_changed(self, table: str):
+        """Reload favorites shown for an empty search once a favorites edit is committed"""
+        if table == 'favorites' and not self._search_term.strip():
+            self.requestFavoritesSignal.emit()
+
+    @Slot(list, int, bool)
+    def on_search_results(self, results: list, generation: int, has_more: bool):
+        """Pass search results to the model unless a newer search has been started since"""
+        if not self._dbreader.search_generation.is_current(generation):
+            return
+        self._file_list_model.on_search_results(results, has_more)
+
+    @Slot()
+    def on_fetch_more_requested(self):
+        """Request the next page of the current search from the database worker"""
+        self.fetchMoreSignal.emit(self._dbreader.search_generation.current)
+
+    @Slot(list, int, bool)
+    def on_more_results(self, results: list, generation: int, has_more: bool):
+        """Append a page of search results to the model unless a newer search has been started since"""
+        if not self._dbreader.search_generation.is_current(generation):
+            return
+        self._file_list_model.on_more_results(results, has_more)
 
     @Property(FileListModel, constant=True) # type: ignore
     def fileListModel(self):
@@ -89,16 +161,30 @@ class Backend(QObject):
     @Property(str, notify=scanStatusChanged) # type: ignore
     def scanStatus(self):
         return self._scan_status
+
+    @Slot(result=dict) # type: ignore
+    def scanTelemetry(self):
+        """Live telemetry of the current (or last) scan"""
+        return get_scan_telemetry().snapshot()
     
     @Slot()
     def shutdown(self):
         """Properly shutdown the database worker thread"""
-        print("Shutting down database worker thread...")
+        print("Shutting down database worker threads...")
         
-        # Signal the worker to clean up
+        # Stop scanning and watching folders, write pending file opens, then signal the worker to clean up
+        self._scanner.shutdown()
+        self._access_flush_timer.stop()
+        self._checkpoint_timer.stop()
+        self.flushAccessSignal.emit()
         self.cleanupSignal.emit()
         
-        # Stop the thread gracefully
+        # Stop the threads gracefully; the reader first, since the writer closes the connections
+        self._dbreader_thread.quit()
+        if not self._dbreader_thread.wait(5000):
+            print("Warning: Database reader thread did not stop gracefully, terminating...")
+            self._dbreader_thread.terminate()
+            self._dbreader_thread.wait()
         self._dbworker_thread.quit()
         
         # Wait for the thread to finish (with timeout)
@@ -114,7 +200,10 @@ class Backend(QObject):
         """Generic async request - returns request ID"""
         request_id = str(uuid.uuid4())
         # print(request_id, request)
-        self.procReq.emit(request_id, request)
+        if (request.get('sql') or '').lower().startswith('select'):
+            self.readReq.emit(request_id, request)
+        else:
+            self.procReq.emit(request_id, request)
         
         return request_id
     
@@ -15,9 +15,10 @@ QtObject {
         });
     }
 
+    // Resolves once the write is committed, so callers can chain a re-read of the table
     function insertRecord(table, column_names: var, values: var) {
 
-        AsyncRequest.request({
+        return AsyncRequest.request({
             command: "sql_command",
             sql: `INSERT`,
             table:table,
@@ -33,7 +34,7 @@ QtObject {
 
     function deleteRecord(table: string, column: string, value: string) {
 
-        AsyncRequest.request({
+        return AsyncRequest.request({
             command: "sql_command",
             sql: `DELETE`,
             table:table,
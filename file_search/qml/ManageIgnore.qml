@@ -1,4 +1,49 @@
+import QtQuick
+import QtQuick.Controls
+import QtQuick.Layouts
 
-ManageTables{
-    table: 'ignore_folders'
-}
\ No newline at end of file
+Rectangle {
+    id: root
+    anchors.fill: parent
+    color: '#90D2CD'
+
+    ColumnLayout {
+        anchors.fill: parent
+        spacing: 0
+
+        TabBar {
+            id: tabs
+            Layout.fillWidth: true
+            TabButton {
+                text: "Ignored Folders"
+                font.pixelSize: Utils.mainText - 2
+                font.family: "consolas"
+            }
+            TabButton {
+                text: "Ignore Patterns"
+                font.pixelSize: Utils.mainText - 2
+                font.family: "consolas"
+            }
+        }
+
+        StackLayout {
+            Layout.fillWidth: true
+            Layout.fillHeight: true
+            currentIndex: tabs.currentIndex
+
+            Item {
+                ManageTables {
+                    table: 'ignore_folders'
+                }
+            }
+            Item {
+                ManageTables {
+                    table: 'ignore_patterns'
+                    column: 'pattern'
+                    textEntry: true
+                    entryHint: 'e.g. *.tmp, node_modules, ~$*, *\\build\\*'
+                }
+            }
+        }
+    }
+}
@@ -9,6 +9,9 @@ Rectangle {
     id: root
     property string table: "folders_to_index"
     property string column: "file_path"
+    // Add items by typing them (e.g. ignore patterns) instead of picking a folder
+    property bool textEntry: false
+    property string entryHint: ""
 
     anchors.fill: parent
     color: '#90D2CD'
@@ -29,11 +32,19 @@ Rectangle {
             return;
         }
         var txt = model.get(listv.currentIndex).path;
-        AsyncRequest.deleteRecord(table, column, txt);
-        updateList();
+        AsyncRequest.deleteRecord(table, column, txt).then(() => root.updateList());
         listv.forceActiveFocus();
     }
 
+    function addTypedItem() {
+        var txt = entryField.text.trim();
+        if (txt === "") {
+            return;
+        }
+        AsyncRequest.insertRecord(table, [column], [txt]).then(() => root.updateList());
+        entryField.text = "";
+    }
+
     function updateList() {
         AsyncRequest.request({
             command: "sql_command",
@@ -74,9 +85,8 @@ Rectangle {
         onAccepted: {
             var path = selectedFolder.toString();
             path = FileOps.uri_to_path(path)
-            AsyncRequest.insertRecord(root.table, [root.column], [path]);
+            AsyncRequest.insertRecord(root.table, [root.column], [path]).then(() => root.updateList());
             console.log(path);
-            root.updateList();
         }
     }
 
@@ -93,12 +103,21 @@ Rectangle {
         Row {
             spacing: 20
             Layout.alignment: Qt.AlignCenter
+            TextField {
+                id: entryField
+                visible: root.textEntry
+                width: 400
+                placeholderText: root.entryHint
+                font.pixelSize: Utils.mainText - 2
+                font.family: "consolas"
+                onAccepted: root.addTypedItem()
+            }
             Button {
                 text: "Add Item"
                 font.pixelSize: Utils.mainText - 2
                 font.family: "consolas"
-                onClicked: folderDialog.open()
-                Keys.onReturnPressed:folderDialog.open()
+                onClicked: root.textEntry ? root.addTypedItem() : folderDialog.open()
+                Keys.onReturnPressed: root.textEntry ? root.addTypedItem() : folderDialog.open()
                 
                 // Keys.onPressed: function (event) {
                 //     if (event.key === Qt.Key_Return || event.key === Qt.Key_Enter) {
@@ -23,8 +23,7 @@ Rectangle {
             return;
         }
         var txt = model.get(listv.currentIndex).path;
-        AsyncRequest.deleteRecord(table, column, txt);
-        updateList();
+        AsyncRequest.deleteRecord(table, column, txt).then(() => root.updateList());
     }
 
     function updateList() {
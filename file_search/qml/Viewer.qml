@@ -1,5 +1,6 @@
 import QtQuick 2.15
 import QtQuick.Controls 2.15
+import fsearch
 
 // import "viewers" as Vf
 
@@ -78,6 +79,7 @@ Rectangle {
             loader.source = componentMap[fileType];
         }
         loader.item.filePath = filePath;
+        FileOps.recordAccess(filePath);
     }
 
     Loader {
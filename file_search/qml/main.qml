@@ -46,11 +46,12 @@ ApplicationWindow {
 
     Timer {
         id: scan_timer
-        interval: 1.8e+6
+        // Checks which folders the rescan scheduler says are due
+        interval: 300000
         // interval:60000
         repeat: true
         triggeredOnStart: true
-        onTriggered: Backend.startScanSignal()
+        onTriggered: Backend.startScanSignal(false)
     }
 
     onClosing: {
@@ -304,7 +305,7 @@ ApplicationWindow {
     }
     Shortcut {
         sequences: ['F4']
-        onActivated: scan_timer.restart()
+        onActivated: Backend.startScanSignal(true)
     }
     Shortcut {
         sequences: ['F5']
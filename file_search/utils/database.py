@@ -4,27 +4,139 @@ Sets up SQLite database with tables for files, favorites, ignore folders, and fo
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional, Callable
+import datetime
+import json
 import os
 from typing import List
 from sqlalchemy import (
     create_engine,
     Column,
     Integer,
+    Float,
     String,
     Text,
     text,
+    bindparam,
     func,
     and_,
     or_,
+    tuple_,
+    inspect,
+    event,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
-from PySide6.QtCore import QMutex
+from PySide6.QtCore import QMutex, QMutexLocker
 from typing import TypedDict, Literal
+from .trigram_index import TrigramIndex
+from .fuzzy import FuzzyMatcher
+from .path_catalog import PathCatalog
+from .result_cache import ResultCache
+from .ignore_rules import DEFAULT_IGNORE_PATTERNS
+from .frecency import add_access
+from .rescan_schedule import RESCAN_HISTORY_SCANS, RootScanRecord, next_scan_time
 Base = declarative_base()
 
+SearchMode = Literal['like', 'trigram', 'fts', 'fuzzy']
+# Search modes answered from the resident path catalog; the others never load it
+CATALOG_SEARCH_MODES = ('trigram', 'fuzzy')
+
+# Keep IN (...) lists below SQLite's bound-variable limit
+IN_CHUNK_SIZE = 900
+# Above this many trigram candidates checking them stops paying off and the LIKE scan is used instead
+TRIGRAM_MAX_ID_FILTER = 10000
+
+# Stands in for "never opened" so frecency can take part in keyset comparisons
+NEVER_OPENED_SCORE = -1e300
+
+# SQLite VM instructions between checks for a superseded search
+PROGRESS_HANDLER_STEPS = 10000
+
+# Set-based write of scanned files: new paths are inserted, known ones get fresh stat data and keep their scan_folder
+UPSERT_CONFLICT_SQL = """ON CONFLICT(file_path) DO UPDATE SET
+        file_size = excluded.file_size,
+        mtime_ns = excluded.mtime_ns,
+        inode = excluded.inode,
+        device = excluded.device"""
+UPSERT_FILES_SQL = """INSERT INTO files (file_path, file_size, mtime_ns, inode, device, scan_folder)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """ + UPSERT_CONFLICT_SQL
+
+# While the path catalog is loaded the rows are staged in a temp table instead, so their ids
+# come back from one join in batch order rather than from a lookup per path
+STAGED_FILES_TABLE_SQL = (
+    "CREATE TEMP TABLE IF NOT EXISTS staged_files "
+    "(file_path TEXT, file_size INTEGER, mtime_ns INTEGER, inode INTEGER, device INTEGER, scan_folder TEXT)"
+)
+STAGE_FILES_SQL = "INSERT INTO staged_files VALUES (?, ?, ?, ?, ?, ?)"
+UPSERT_STAGED_FILES_SQL = """INSERT INTO files (file_path, file_size, mtime_ns, inode, device, scan_folder)
+    SELECT file_path, file_size, mtime_ns, inode, device, scan_folder FROM staged_files WHERE true
+    """ + UPSERT_CONFLICT_SQL
+UPSERTED_FILE_IDS_SQL = (
+    "SELECT files.id FROM staged_files CROSS JOIN files ON files.file_path = staged_files.file_path "
+    "ORDER BY staged_files.rowid"
+)
+CLEAR_STAGED_FILES_SQL = "DELETE FROM staged_files"
+
+# Paths to delete are staged in a temp table and matched through the unique file_path index,
+# so a deletion of any size is a handful of statements without a bound-variable list
+DELETE_PATHS_TABLE_SQL = "CREATE TEMP TABLE IF NOT EXISTS delete_paths (file_path TEXT PRIMARY KEY)"
+STAGE_DELETE_PATHS_SQL = "INSERT OR IGNORE INTO delete_paths (file_path) VALUES (?)"
+STAGED_FILE_IDS_SQL = "SELECT id FROM files WHERE file_path IN (SELECT file_path FROM delete_paths)"
+DELETE_STAGED_FILES_SQL = "DELETE FROM files WHERE file_path IN (SELECT file_path FROM delete_paths)"
+CLEAR_DELETE_PATHS_SQL = "DELETE FROM delete_paths"
+
+
+
+class ConnectionProfile(NamedTuple):
+    """SQLite settings applied to every pooled connection when it is opened."""
+
+    # WAL lets searches read while a scan commits; NORMAL only syncs at checkpoints, which is safe in WAL mode
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size_kib: int = 64 * 1024
+    temp_store: str = 'MEMORY'
+    busy_timeout_ms: int = 5000
+    # The WAL file is truncated back to this size after a checkpoint
+    journal_size_limit: int = 64 * 1024 * 1024
+
+
+DEFAULT_CONNECTION_PROFILE = ConnectionProfile()
+
+# Scan history rows kept per scan root
+SCAN_HISTORY_KEPT = 50
+# Rows read per database lock while loading a root's prior state
+PRIOR_STATE_CHUNK = 50000
+
+# file_path -> (mtime_ns, inode) of the files indexed under one scan root
+PriorState = dict[str, tuple[int, Optional[int]]]
+PriorStateLoader = Callable[[str], PriorState]
+
+# External-content FTS5 table mirroring files.file_path, kept in sync by triggers
+FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE files_fts USING fts5("
+    "file_path, content='files', content_rowid='id', tokenize='trigram')"
+)
+FTS_TRIGGERS_SQL = [
+    """CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts(rowid, file_path) VALUES (new.id, new.file_path);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, file_path) VALUES ('delete', old.id, old.file_path);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE OF file_path ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, file_path) VALUES ('delete', old.id, old.file_path);
+        INSERT INTO files_fts(rowid, file_path) VALUES (new.id, new.file_path);
+    END""",
+]
+
+
+class SearchCancelled(Exception):
+    """Raised when a search is superseded by a newer one while it runs."""
+
 
 class DbRequest(TypedDict):
     command: Literal['sql_command']
@@ -44,8 +156,10 @@ class File(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     file_path = Column(Text, nullable=False, unique=True)  # Full path
     file_size = Column(Integer, nullable=False)
-    last_modified_date = Column(String, nullable=False)
-    scan_folder = Column(Text, nullable=False)  # Full path
+    mtime_ns = Column(Integer, nullable=False)  # st_mtime_ns; formatted only for display
+    inode = Column(Integer)  # st_ino and st_dev where the scan gets them for free, else NULL
+    device = Column(Integer)
+    scan_folder = Column(Text, nullable=False, index=True)  # Full path
 
 
 class RecurringFile(Base):
@@ -75,6 +189,15 @@ class IgnoreFolder(Base):
     file_path = Column(Text, nullable=False, unique=True)
 
 
+class IgnorePattern(Base):
+    """Model for the ignore_patterns table (globs such as *.tmp or node_modules)."""
+
+    __tablename__ = "ignore_patterns"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pattern = Column(Text, nullable=False, unique=True)
+
+
 class FolderToIndex(Base):
     """Model for the folders_to_index table."""
 
@@ -85,14 +208,27 @@ class FolderToIndex(Base):
 
 
 class ScanHistory(Base):
-    """Model for the scan_history table."""
+    """Model for the scan_history table: one row per scan root per scan."""
 
     __tablename__ = "scan_history"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     start_time = Column(String, nullable=False)
-    duration_seconds = Column(Integer, nullable=False)
-    files_processed = Column(Integer, nullable=False)
+    duration_seconds = Column(Float, nullable=False)  # time spent walking the root, summed over threads
+    files_processed = Column(Integer, nullable=False)  # files seen
+    scan_folder = Column(Text)
+    files_changed = Column(Integer, nullable=False, server_default='0')  # new, modified and deleted files
+
+
+class ScanTelemetry(Base):
+    """Model for the scan_telemetry table: the telemetry snapshot of each completed scan."""
+
+    __tablename__ = "scan_telemetry"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    start_time = Column(String, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    snapshot = Column(Text, nullable=False)  # JSON, see telemetry.py
 
 
 class FileAccessed(Base):
@@ -105,6 +241,18 @@ class FileAccessed(Base):
     accessed_time = Column(String, nullable=False)
 
 
+class FileFrecency(Base):
+    """Model for the file_frecency table: one precomputed, time-decayed score per opened file."""
+
+    __tablename__ = "file_frecency"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_path = Column(Text, nullable=False, unique=True)
+    score = Column(Float, nullable=False)  # log-space, see frecency.py
+    access_count = Column(Integer, nullable=False, default=0)
+    last_accessed = Column(String, nullable=False)
+
+
 class FileAlias(Base):
     """Model for the file_alias table."""
 
@@ -118,29 +266,168 @@ class FileAlias(Base):
 class DatabaseManager:
     """Manages the SQLite database for the file search application using SQLAlchemy."""
 
-    def __init__(self, db_name="file_search.db"):
-        """Initialize the database manager."""
+    def __init__(
+        self,
+        db_name="file_search.db",
+        search_mode: SearchMode = 'fts',
+        db_path: Optional[Path] = None,
+        connection_profile: ConnectionProfile = DEFAULT_CONNECTION_PROFILE,
+    ):
+        """Initialize the database manager; db_path overrides the per-user database file."""
         self.db_name = db_name
+        self.db_path = Path(db_path) if db_path else Path(__file__).parent.joinpath(f"{os.getlogin()}_files.db")
+        self.search_mode: SearchMode = search_mode
+        self.connection_profile = connection_profile
         self.engine = None
         self.SessionLocal = None
-        self.db_mutex = QMutex()  # Mutex to protect database operations
+        # Query-only connections for searches and other reads, which never wait for db_mutex
+        self.read_engine = None
+        self.ReadSessionLocal = None
+        self.db_mutex = QMutex()  # Mutex to protect database writes
+        # Guards the in-memory indexes below, which the reader searches while the writer updates them
+        self.index_mutex = QMutex()
+        self.trigram_index = TrigramIndex()
+        self.fuzzy_matcher = FuzzyMatcher()
+        self.path_catalog = PathCatalog()
+        self.result_cache = ResultCache()
         self.setup_database()
         # self.vaccum_db()
 
-    def setup_database(self):
-        db_path = Path(__file__).parent.joinpath(f"{os.getlogin()}_files.db")
-        self.engine = create_engine(
-            f"sqlite:///{db_path}",
+    def _create_engine(self, read_only: bool = False):
+        engine = create_engine(
+            f"sqlite:///{self.db_path}",
             echo=False,
             pool_pre_ping=True,
             pool_recycle=3600,
             pool_timeout=30,
             max_overflow=10
         )
-        Base.metadata.create_all(bind=self.engine)
+        event.listen(engine, "connect", self._apply_connection_profile)
+        if read_only:
+            event.listen(engine, "connect", self._make_query_only)
+        return engine
+
+    @staticmethod
+    def _make_query_only(dbapi_connection, connection_record):
+        """Reject writes on a read connection, so a read can never take the write lock"""
+        dbapi_connection.execute("PRAGMA query_only = ON")
+
+    def _open_sessions(self):
+        """Session factories for the write engine and a new read engine"""
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
+        self.read_engine = self._create_engine(read_only=True)
+        self.ReadSessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.read_engine
+        )
+
+    def _apply_connection_profile(self, dbapi_connection, connection_record):
+        """Set the connection profile's pragmas on a newly opened connection"""
+        profile = self.connection_profile
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+            cursor.execute(f"PRAGMA synchronous = {profile.synchronous}")
+            cursor.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+            # Negative sizes are in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size = {-int(profile.cache_size_kib)}")
+            cursor.execute(f"PRAGMA temp_store = {profile.temp_store}")
+            cursor.execute(f"PRAGMA journal_size_limit = {int(profile.journal_size_limit)}")
+        finally:
+            cursor.close()
+
+    def checkpoint_wal(self):
+        """
+        Copy committed WAL pages back into the database file without waiting for readers.
+        SQLite checkpoints on its own every 1000 pages; this keeps the WAL short between scans as well.
+        """
+        if self.engine is None or self.connection_profile.journal_mode.upper() != 'WAL':
+            return
+        # No db_mutex: a passive checkpoint skips pages still in use and never blocks readers or the writer
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to checkpoint WAL: {str(e)}")
+
+    def setup_database(self):
+        self.engine = self._create_engine()
+        new_ignore_patterns = not inspect(self.engine).has_table(IgnorePattern.__tablename__)
+        Base.metadata.create_all(bind=self.engine)
+        self._migrate_file_mtimes()
+        self._add_missing_columns()
+        if new_ignore_patterns:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    IgnorePattern.__table__.insert(),
+                    [{"pattern": p} for p in DEFAULT_IGNORE_PATTERNS],
+                )
+        if self.search_mode == 'fts':
+            self.setup_fts()
+        # Opened once the schema is in place, since read connections can't create or migrate it
+        self._open_sessions()
+
+    def _migrate_file_mtimes(self):
+        """
+        Rebuild a files table that stores last_modified_date strings with integer mtime_ns instead.
+        Ids are kept, so the FTS table stays valid; its triggers are recreated by setup_fts.
+        """
+        columns = {column["name"] for column in inspect(self.engine).get_columns(File.__tablename__)}
+        if "mtime_ns" in columns:
+            return
+        print("Migrating files table to integer modification times...")
+        with self.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE files RENAME TO files_old"))
+            File.__table__.create(conn)  # type: ignore
+            # The strings hold local time with whole seconds
+            conn.execute(text(
+                "INSERT INTO files (id, file_path, file_size, mtime_ns, scan_folder) "
+                "SELECT id, file_path, file_size, "
+                "COALESCE(CAST(strftime('%s', last_modified_date, 'utc') AS INTEGER), 0) * 1000000000, scan_folder "
+                "FROM files_old"
+            ))
+            conn.execute(text("DROP TABLE files_old"))
+
+    def _add_missing_columns(self):
+        """Add model columns and indexes missing from tables created by an older version; create_all only creates tables."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        print(f"Creating index {index.name}")
+                        index.create(conn)
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_sql = f"{column.name} {column.type.compile(dialect=self.engine.dialect)}"
+                    if column.server_default is not None:
+                        column_sql += f" NOT NULL DEFAULT {column.server_default.arg}"  # type: ignore
+                    print(f"Adding column {table.name}.{column.name}")
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_sql}"))
+
+    def setup_fts(self):
+        """Create the FTS5 path table and its sync triggers, backfilling it the first time."""
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'")
+                ).first()
+                if not exists:
+                    conn.execute(text(FTS_TABLE_SQL))
+                for trigger_sql in FTS_TRIGGERS_SQL:
+                    conn.execute(text(trigger_sql))
+                if not exists:
+                    print("Backfilling FTS search table...")
+                    conn.execute(text("INSERT INTO files_fts(files_fts) VALUES ('rebuild')"))
+        except SQLAlchemyError as e:
+            # SQLite builds without FTS5 or the trigram tokenizer (< 3.34)
+            print(f"FTS search unavailable, using LIKE search: {e}")
+            self.search_mode = 'like'
 
     def vaccum_db(self):
         session = self.get_session()
@@ -151,38 +438,60 @@ class DatabaseManager:
             raise Exception("Database not initialized. Call setup_database() first.")
         return self.SessionLocal()
 
+    def get_read_session(self) -> Session:
+        """
+        Session on a query-only connection. WAL lets it read the last committed data while a write
+        is in progress, so reads don't take db_mutex.
+        """
+        if not self.ReadSessionLocal:
+            raise Exception("Database not initialized. Call setup_database() first.")
+        return self.ReadSessionLocal()
+
     def get_favorites(self):
-        self.db_mutex.lock()
+        session = self.get_read_session()
         try:
-            session = self.get_session()
-            try:
-                query = (session.query(
-                    File,
-                    Favorite.id.isnot(None).label("is_favorite"),
-                ).join(Favorite, File.file_path == Favorite.file_path)
-                .order_by(File.last_modified_date.desc())
-                )
-                return query.all()
-            except SQLAlchemyError as e:
-                raise Exception(f"Failed to get favorites: {str(e)}")
-            finally:
-                session.close()
+            query = (session.query(
+                File,
+                Favorite.id.isnot(None).label("is_favorite"),
+            ).join(Favorite, File.file_path == Favorite.file_path)
+            .outerjoin(FileFrecency, File.file_path == FileFrecency.file_path)
+            .order_by(FileFrecency.score.desc(), File.mtime_ns.desc())
+            )
+            return query.all()
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to get favorites: {str(e)}")
         finally:
-            self.db_mutex.unlock()
+            session.close()
 
 
     def bulk_delete_files(self, file_paths: List[str]):
-        """Delete multiple files by their paths"""
+        """Delete multiple files by their paths, staged through the delete_paths temp table"""
+        if not file_paths:
+            return 0
         self.db_mutex.lock()
         try:
             session = self.get_session()
             try:
-                deleted_count = (
-                    session.query(File)
-                    .filter(File.file_path.in_(file_paths))
-                    .delete(synchronize_session=False)
-                )
+                connection = session.connection()
+                connection.exec_driver_sql(DELETE_PATHS_TABLE_SQL)
+                connection.exec_driver_sql(STAGE_DELETE_PATHS_SQL, [(file_path,) for file_path in file_paths])
+                file_ids = []
+                if self.path_catalog.is_loaded:
+                    file_ids = [file_id for (file_id,) in connection.exec_driver_sql(STAGED_FILE_IDS_SQL)]
+
+                deleted_count = connection.exec_driver_sql(DELETE_STAGED_FILES_SQL).rowcount
+                connection.exec_driver_sql(CLEAR_DELETE_PATHS_SQL)
                 session.commit()
+                if file_ids:
+                    # The trigram index and the fuzzy matcher skip removed catalog rows
+                    self.index_mutex.lock()
+                    try:
+                        for file_id in file_ids:
+                            self.path_catalog.remove(file_id)
+                    finally:
+                        self.index_mutex.unlock()
+                if deleted_count:
+                    self.result_cache.invalidate()
                 return deleted_count
             except SQLAlchemyError as e:
                 session.rollback()
@@ -192,25 +501,80 @@ class DatabaseManager:
         finally:
             self.db_mutex.unlock()
 
-    def get_files_for_scan_folder(self, scan_folder: str):
+    def upsert_files(self, files_info: List[dict]) -> int:
+        """
+        Insert new files and update the stat data of known ones in one transaction.
+        A single executemany of UPSERT_FILES_SQL on the driver cursor, without per-row lookups or ORM objects.
+        While the path catalog is loaded the rows go through the staged_files temp table, and the
+        catalog and the in-memory indexes are updated from files_info and the ids the join returns.
+        """
+        if not files_info:
+            return 0
+        rows = [
+            (f['path'], f['file_size'], f['mtime_ns'], f.get('inode'), f.get('device'), f['scan_folder'])
+            for f in files_info
+        ]
+        file_ids = None
         self.db_mutex.lock()
         try:
             session = self.get_session()
             try:
-                files = session.query(File).filter(File.scan_folder == str(scan_folder)).all()
-                return files
+                connection = session.connection()
+                if self.path_catalog.is_loaded:
+                    connection.exec_driver_sql(STAGED_FILES_TABLE_SQL)
+                    connection.exec_driver_sql(STAGE_FILES_SQL, rows)
+                    connection.exec_driver_sql(UPSERT_STAGED_FILES_SQL)
+                    file_ids = [file_id for (file_id,) in connection.exec_driver_sql(UPSERTED_FILE_IDS_SQL)]
+                    connection.exec_driver_sql(CLEAR_STAGED_FILES_SQL)
+                else:
+                    connection.exec_driver_sql(UPSERT_FILES_SQL, rows)
+                session.commit()
             except SQLAlchemyError as e:
-                raise Exception(f"Failed to get files for scan folder: {str(e)}")
+                session.rollback()
+                raise Exception(f"Failed to upsert files: {str(e)}")
             finally:
                 session.close()
         finally:
             self.db_mutex.unlock()
+        if file_ids is not None:
+            self.update_search_index(files_info, file_ids)
+        return len(rows)
+
+    def get_prior_state(self, scan_folder: str) -> PriorState:
+        """
+        What the index holds for one scan root, as file_path -> (mtime_ns, inode).
+        Called from scan threads on read connections; rows are read in id order PRIOR_STATE_CHUNK at a
+        time so no read transaction stays open for the whole root.
+        """
+        state: PriorState = {}
+        last_id = 0
+        while True:
+            session = self.get_read_session()
+            try:
+                rows = (
+                    session.query(File.id, File.file_path, File.mtime_ns, File.inode)
+                    .filter(File.scan_folder == str(scan_folder), File.id > last_id)
+                    .order_by(File.id)
+                    .limit(PRIOR_STATE_CHUNK)
+                    .all()
+                )
+            except SQLAlchemyError as e:
+                raise Exception(f"Failed to get prior state for scan folder: {str(e)}")
+            finally:
+                session.close()
+            for _, file_path, mtime_ns, inode in rows:
+                state[file_path] = (mtime_ns, inode)
+            if len(rows) < PRIOR_STATE_CHUNK:
+                return state
+            last_id = rows[-1][0]
 
     def _sql_command(self, request:DbRequest):
-        self.db_mutex.lock()
         if not request['sql']:
             return {'result': 0}
+        if request['sql'].lower().startswith('select'):
+            return self._select(request['sql'])
 
+        self.db_mutex.lock()
         try:
             session = self.get_session()
             sql = request['sql']
@@ -229,6 +593,9 @@ class DatabaseManager:
                     sql_txt = f"DELETE FROM {table_ref} WHERE {col_ref} = '{value}'"
                     session.execute(text(sql_txt), params=params)
                     session.commit()
+                    # Table edits change what a search would return. Invalidated once committed, so a
+                    # search on the reader meanwhile can't cache the old rows under the new generation
+                    self.result_cache.invalidate()
                     session.close()
                     return {'result':1}
                 except SQLAlchemyError as e:
@@ -247,48 +614,74 @@ class DatabaseManager:
                     sql_txt = f"INSERT OR IGNORE INTO {table_ref} ({columns_ref}) VALUES ({values_ref})"
                     session.execute(text(sql_txt), params=params)
                     session.commit()
+                    self.result_cache.invalidate()
                     session.close()
                     return {'result':1}
                 except SQLAlchemyError as e:
                     raise Exception(f"sql command failed: {str(e)}")
-            if sql.lower().startswith('select'):
-                try:
-                    result = session.execute(text(sql)).all()
-                    result = [[c for c in row] for row in result]
-                    session.close()
-                    return {'result':result}
-                except SQLAlchemyError as e:
-                    raise Exception(f"sql command failed: {str(e)}")
-            else:
-                try:
-                    session.execute(text(sql))
-                    session.commit()
-                    session.close()
-                    return {'result':1}
-                except SQLAlchemyError as e:
-                    raise Exception(f"sql command failed: {str(e)}")
+            try:
+                session.execute(text(sql))
+                session.commit()
+                self.result_cache.invalidate()
+                session.close()
+                return {'result':1}
+            except SQLAlchemyError as e:
+                raise Exception(f"sql command failed: {str(e)}")
         finally:
             self.db_mutex.unlock()
+
+    def _select(self, sql: str):
+        """Run a SELECT sql_command on a read connection"""
+        session = self.get_read_session()
+        try:
+            result = session.execute(text(sql)).all()
+            return {'result': [[c for c in row] for row in result]}
+        except SQLAlchemyError as e:
+            raise Exception(f"sql command failed: {str(e)}")
+        finally:
+            session.close()
             
 
+    def _indexed_scan_folders(self, session: Session) -> list[str]:
+        """Distinct scan_folder values of the files table, one ix_files_scan_folder seek per folder."""
+        scan_folders = []
+        scan_folder = session.query(func.min(File.scan_folder)).scalar()
+        while scan_folder is not None:
+            scan_folders.append(scan_folder)
+            scan_folder = session.query(func.min(File.scan_folder)).filter(File.scan_folder > scan_folder).scalar()
+        return scan_folders
+
     def delete_removed(self):
         """Delete files whose scan_folder is not in the folders_to_index list."""
         self.db_mutex.lock()
         try:
             session = self.get_session()
             try:
-                # Delete files where scan_folder is not in the folders to index
-                deleted_count = (
-                    session.query(File)
-                    .filter(
-                        and_(
-                            ~File.scan_folder.in_(session.query(FolderToIndex.file_path)),
-                            File.scan_folder != 'recent_files'  # Exclude recent_files from deletion
-                        )
+                # Compare the few scan roots instead of testing every file against the folders to index
+                keep = {file_path for (file_path,) in session.query(FolderToIndex.file_path)}
+                keep.add('recent_files')  # Exclude recent_files from deletion
+                removed_roots = [folder for folder in self._indexed_scan_folders(session) if folder not in keep]
+
+                deleted_count = 0
+                for root in removed_roots:
+                    # Each removed root is one delete through the scan_folder index
+                    removed = File.scan_folder == root
+                    if self.path_catalog.is_loaded:
+                        file_ids = [file_id for (file_id,) in session.query(File.id).filter(removed)]
+                        self.index_mutex.lock()
+                        try:
+                            for file_id in file_ids:
+                                self.path_catalog.remove(file_id)
+                        finally:
+                            self.index_mutex.unlock()
+                    deleted_count += (
+                        session.query(File)
+                        .filter(removed)
+                        .delete(synchronize_session=False)
                     )
-                    .delete(synchronize_session=False)
-                )
                 session.commit()
+                if deleted_count:
+                    self.result_cache.invalidate()
                 return deleted_count
             except SQLAlchemyError as e:
                 session.rollback()
@@ -298,37 +691,255 @@ class DatabaseManager:
         finally:
             self.db_mutex.unlock()
 
-    def get_file_count(self) -> int:
-        """Get the total number of indexed files."""
+    def record_file_accesses(self, accesses: list[tuple[str, float]]):
+        """Store a batch of (file_path, timestamp) opens and fold them into the frecency scores."""
+        if not accesses:
+            return
         self.db_mutex.lock()
         try:
             session = self.get_session()
             try:
-                count = session.query(func.count(File.id)).scalar()
-                return count or 0
+                by_path: dict[str, list[float]] = {}
+                for file_path, timestamp in accesses:
+                    by_path.setdefault(file_path, []).append(timestamp)
+                    session.add(FileAccessed(
+                        file_path=file_path,
+                        accessed_time=datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                    ))
+
+                paths = list(by_path)
+                existing = {}
+                for i in range(0, len(paths), IN_CHUNK_SIZE):
+                    chunk = paths[i : i + IN_CHUNK_SIZE]
+                    for row in session.query(FileFrecency).filter(FileFrecency.file_path.in_(chunk)):
+                        existing[row.file_path] = row
+
+                for file_path, timestamps in by_path.items():
+                    row = existing.get(file_path)
+                    if row is None:
+                        row = FileFrecency(file_path=file_path, score=None, access_count=0)
+                        session.add(row)
+                    for timestamp in sorted(timestamps):
+                        row.score = add_access(row.score, timestamp)
+                    row.access_count += len(timestamps)
+                    row.last_accessed = datetime.datetime.fromtimestamp(max(timestamps)).strftime('%Y-%m-%d %H:%M:%S')
+
+                session.commit()
+                # Result order depends on frecency
+                self.result_cache.invalidate()
             except SQLAlchemyError as e:
-                raise Exception(f"Failed to get file count: {str(e)}")
+                session.rollback()
+                raise Exception(f"Failed to record file accesses: {str(e)}")
             finally:
                 session.close()
         finally:
             self.db_mutex.unlock()
 
+    def record_root_scan(self, scan_folder: str, start_time: str, duration_seconds: float, files_seen: int, files_changed: int):
+        """Store the outcome of scanning one root, keeping the last SCAN_HISTORY_KEPT scans per root."""
+        self.db_mutex.lock()
+        try:
+            session = self.get_session()
+            try:
+                session.add(ScanHistory(
+                    scan_folder=scan_folder,
+                    start_time=start_time,
+                    duration_seconds=duration_seconds,
+                    files_processed=files_seen,
+                    files_changed=files_changed,
+                ))
+                session.flush()
+                kept = (
+                    session.query(ScanHistory.id)
+                    .filter(ScanHistory.scan_folder == scan_folder)
+                    .order_by(ScanHistory.id.desc())
+                    .limit(SCAN_HISTORY_KEPT)
+                )
+                session.query(ScanHistory).filter(
+                    ScanHistory.scan_folder == scan_folder, ScanHistory.id.notin_(kept.scalar_subquery())
+                ).delete(synchronize_session=False)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                raise Exception(f"Failed to record scan history: {str(e)}")
+            finally:
+                session.close()
+        finally:
+            self.db_mutex.unlock()
+
+    def record_scan_telemetry(self, snapshot: dict):
+        """Store the telemetry snapshot of a completed scan, keeping the last SCAN_HISTORY_KEPT scans."""
+        self.db_mutex.lock()
+        try:
+            session = self.get_session()
+            try:
+                session.add(ScanTelemetry(
+                    start_time=datetime.datetime.fromtimestamp(snapshot['start_time']).strftime('%Y-%m-%d %H:%M:%S'),
+                    duration_seconds=snapshot['elapsed_seconds'],
+                    snapshot=json.dumps(snapshot),
+                ))
+                session.flush()
+                kept = session.query(ScanTelemetry.id).order_by(ScanTelemetry.id.desc()).limit(SCAN_HISTORY_KEPT)
+                session.query(ScanTelemetry).filter(
+                    ScanTelemetry.id.notin_(kept.scalar_subquery())
+                ).delete(synchronize_session=False)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                raise Exception(f"Failed to record scan telemetry: {str(e)}")
+            finally:
+                session.close()
+        finally:
+            self.db_mutex.unlock()
 
-    def get_files_by_search(self, search_term: str, limit=None):
+    def get_scan_folders_due(self, scan_folders: list[str], now: Optional[datetime.datetime] = None) -> list[str]:
+        """The scan roots whose adaptive rescan interval has passed; roots never scanned are always due."""
+        now = now or datetime.datetime.now()
         self.db_mutex.lock()
         try:
             session = self.get_session()
             try:
-                terms = search_term.strip().split()
-                if not terms:
+                due = []
+                for scan_folder in scan_folders:
+                    rows = (
+                        session.query(ScanHistory.start_time, ScanHistory.duration_seconds, ScanHistory.files_changed)
+                        .filter(ScanHistory.scan_folder == scan_folder)
+                        .order_by(ScanHistory.id.desc())
+                        .limit(RESCAN_HISTORY_SCANS)
+                        .all()
+                    )
+                    history = [
+                        RootScanRecord(datetime.datetime.strptime(start, '%Y-%m-%d %H:%M:%S'), duration, changed)
+                        for start, duration, changed in reversed(rows)
+                    ]
+                    next_time = next_scan_time(history)
+                    if next_time is None or next_time <= now:
+                        due.append(scan_folder)
+                return due
+            except SQLAlchemyError as e:
+                raise Exception(f"Failed to get scan folders due: {str(e)}")
+            finally:
+                session.close()
+        finally:
+            self.db_mutex.unlock()
+
+    def get_file_count(self) -> int:
+        """Get the total number of indexed files."""
+        session = self.get_read_session()
+        try:
+            count = session.query(func.count(File.id)).scalar()
+            return count or 0
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to get file count: {str(e)}")
+        finally:
+            session.close()
+
+
+    def get_files_by_search(
+        self,
+        search_term: str,
+        limit=None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        after: Optional[tuple] = None,
+    ):
+        """
+        Search files whose path contains every term of search_term.
+
+        Rows are (File, is_favorite, frecency). Pass search_cursor() of the last row
+        received as `after` to get the next page (keyset pagination).
+        If is_cancelled is given it is polled while the query runs, and the search is
+        aborted with SearchCancelled as soon as it returns True.
+        Repeated searches are answered from the result cache until the data changes.
+        """
+        cache_key = self.result_cache.key(search_term, limit, after)
+        cached_ids = self.result_cache.get(cache_key)
+        if cached_ids is not None:
+            return self.get_files_by_ids(cached_ids)
+
+        generation = self.result_cache.generation
+        rows = self._search_files(search_term, limit, is_cancelled, after)
+        self.result_cache.put(cache_key, [row[0].id for row in rows], generation)
+        return rows
+
+    def get_search_candidates(
+        self, search_term: str, limit: int, is_cancelled: Optional[Callable[[], bool]] = None
+    ) -> Optional[list[tuple[int, str]]]:
+        """
+        (id, file_path) of every file get_files_by_search would return, in the same order,
+        or None when more than limit files match.
+
+        Much cheaper than full result rows, for holding a result set in memory. The query
+        is unordered and stops at limit + 1 rows, so broad searches give up early;
+        a complete set is sorted here. Not supported in fuzzy mode.
+        """
+        rows = self._search_files(search_term, limit + 1, is_cancelled, ids_only=True)
+        if len(rows) > limit:
+            return None
+        rows.sort(key=lambda row: (bool(row[2]), row[3], row[4], row[0]), reverse=True)
+        return [(file_id, file_path) for file_id, file_path, *_ in rows]
+
+    def _search_files(
+        self,
+        search_term: str,
+        limit=None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        after: Optional[tuple] = None,
+        ids_only: bool = False,
+    ):
+        """Run a search against the configured search engine, bypassing the result cache."""
+        if self.search_mode == 'fuzzy' and self.fuzzy_matcher.is_built and not ids_only:
+            # Fuzzy scores are computed in memory, so callers page by asking for a larger limit
+            return self.get_files_by_fuzzy_search(search_term, limit, is_cancelled)
+
+        session = self.get_read_session()
+        dbapi_connection = None
+        try:
+            terms = search_term.strip().split()
+            if not terms:
+                return []
+
+            if is_cancelled is not None:
+                dbapi_connection = session.connection().connection.driver_connection
+                dbapi_connection.set_progress_handler(  # type: ignore
+                    lambda: 1 if is_cancelled() else 0, PROGRESS_HANDLER_STEPS
+                )
+
+            is_favorite = Favorite.id.isnot(None)
+            frecency = func.coalesce(FileFrecency.score, NEVER_OPENED_SCORE)
+            if ids_only:
+                columns = (File.id, File.file_path, is_favorite, frecency, File.mtime_ns)
+            else:
+                columns = (File, is_favorite.label("is_favorite"), frecency.label("frecency"))
+            query = (
+                session.query(*columns)
+                .outerjoin(Favorite, File.file_path == Favorite.file_path)
+                .outerjoin(FileFrecency, File.file_path == FileFrecency.file_path)
+            )
+
+            matched_ids = None
+            if self.search_mode == 'trigram':
+                matched_ids = self._trigram_search(terms)
+                if is_cancelled is not None and is_cancelled():
+                    raise SearchCancelled()
+
+            if matched_ids is not None:
+                if not matched_ids:
                     return []
+                # Ids are rendered inline so the list is not bound by SQLite's variable limit
+                query = query.filter(
+                    File.id.in_(bindparam("matched_ids", sorted(matched_ids), expanding=True, literal_execute=True))
+                )
+            else:
+                like_terms = terms
+                if self.search_mode == 'fts':
+                    # The trigram tokenizer can only match terms of 3 or more characters
+                    fts_terms = [t for t in terms if len(t) >= 3]
+                    like_terms = [t for t in terms if len(t) < 3]
+                    if fts_terms:
+                        query = query.filter(File.id.in_(self._fts_match(fts_terms)))
 
-                query = session.query(
-                    File,
-                    Favorite.id.isnot(None).label("is_favorite"),
-                ).outerjoin(Favorite, File.file_path == Favorite.file_path)
                 criteria = []
-                for term in terms:
+                for term in like_terms:
                     term_criteria = or_(
                         File.file_path.ilike(f"%{term}%"),
                     )
@@ -337,45 +948,242 @@ class DatabaseManager:
                 if criteria:
                     query = query.filter(and_(*criteria))
 
+            sort_key = (is_favorite, frecency, File.mtime_ns, File.id)
+            if after is not None:
+                query = query.filter(tuple_(*sort_key) < tuple_(*after))
+
+            if not ids_only:
                 query = query.order_by(
-                    Favorite.id.isnot(None).desc(),  # Favorites first
-                    File.last_modified_date.desc(),  # Then alphabetically by file path
+                    is_favorite.desc(),  # Favorites first
+                    frecency.desc(),  # Then most frecently opened
+                    File.mtime_ns.desc(),  # Then most recently modified
+                    File.id.desc(),  # Unique tie-breaker so pages never overlap
                 )
 
-                # Apply limit if provided
-                if limit is not None:
-                    query = query.limit(limit)
+            # Apply limit if provided
+            if limit is not None:
+                query = query.limit(limit)
 
-                # Execute the query and return the results
-                return query.all()
+            # Execute the query and return the results
+            if ids_only:
+                return [tuple(row) for row in query.all()]
+            return query.all()
 
-            except SQLAlchemyError as e:
-                raise Exception(f"Failed to search files: {str(e)}")
-            finally:
-                session.close()
+        except SQLAlchemyError as e:
+            if is_cancelled is not None and is_cancelled():
+                # The progress handler interrupted the query
+                raise SearchCancelled()
+            raise Exception(f"Failed to search files: {str(e)}")
         finally:
-            self.db_mutex.unlock()
+            if dbapi_connection is not None:
+                dbapi_connection.set_progress_handler(None, 0)  # type: ignore
+            session.close()
+
+    def get_files_by_ids(self, file_ids: list[int]):
+        """Search result rows for file_ids, in the order given; ids that no longer exist are skipped."""
+        if not file_ids:
+            return []
+        session = self.get_read_session()
+        try:
+            return self._rows_for_ids(session, file_ids)
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to get files by id: {str(e)}")
+        finally:
+            session.close()
+
+    @staticmethod
+    def _rows_for_ids(session: Session, file_ids: list[int]):
+        """(File, is_favorite, frecency) rows for file_ids, in the order given."""
+        rows = (
+            session.query(
+                File,
+                Favorite.id.isnot(None).label("is_favorite"),
+                func.coalesce(FileFrecency.score, NEVER_OPENED_SCORE).label("frecency"),
+            )
+            .outerjoin(Favorite, File.file_path == Favorite.file_path)
+            .outerjoin(FileFrecency, File.file_path == FileFrecency.file_path)
+            .filter(File.id.in_(bindparam("file_ids", file_ids, expanding=True, literal_execute=True)))
+            .all()
+        )
+        rank = {file_id: i for i, file_id in enumerate(file_ids)}
+        rows.sort(key=lambda row: rank[row[0].id])
+        return rows
+
+    @staticmethod
+    def search_cursor(row) -> tuple:
+        """Keyset position of a get_files_by_search row, used as `after` for the next page."""
+        file_obj, is_favorite, frecency = row
+        return (bool(is_favorite), frecency, file_obj.mtime_ns, file_obj.id)
+
+    def get_files_by_fuzzy_search(self, search_term: str, limit=None, is_cancelled: Optional[Callable[[], bool]] = None):
+        """
+        Rank files by fuzzy subsequence score against the in-memory path catalog.
+
+        Favorites, then frecency, then the most recently modified files win ties on score.
+        index_mutex is taken per chunk of paths scored, so the writer is never held up for a whole search.
+        """
+        session = self.get_read_session()
+        try:
+            if not search_term.strip():
+                return []
+
+            favorites = {path for (path,) in session.query(Favorite.file_path)}
+            frecency = dict(session.query(FileFrecency.file_path, FileFrecency.score).all())
+            # Scored by the matcher whatever its budgets, as they win ties on score
+            boosted_paths = list(favorites.union(frecency))
+            boosted_ids = []
+            for i in range(0, len(boosted_paths), IN_CHUNK_SIZE):
+                chunk = boosted_paths[i : i + IN_CHUNK_SIZE]
+                boosted_ids.extend(file_id for (file_id,) in session.query(File.id).filter(File.file_path.in_(chunk)))
+            # Swapped by load_path_catalog; a search keeps using the pair it started with
+            fuzzy_matcher, catalog = self.fuzzy_matcher, self.path_catalog
+            ranked_ids = fuzzy_matcher.search(
+                catalog,
+                search_term,
+                limit if limit is not None else len(fuzzy_matcher),
+                favorites,
+                frecency,
+                boosted_ids,
+                is_cancelled,
+                lock=lambda: QMutexLocker(self.index_mutex),
+            )
+            if is_cancelled is not None and is_cancelled():
+                raise SearchCancelled()
+            if not ranked_ids:
+                return []
+
+            return self._rows_for_ids(session, ranked_ids)
+
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to fuzzy search files: {str(e)}")
+        finally:
+            session.close()
+
+    @staticmethod
+    def _fts_match(terms: list[str]):
+        """Rowids of files_fts entries containing every term as a substring."""
+        # Each term is quoted as an FTS5 string so path punctuation is not parsed as query syntax
+        fts_query = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        return (
+            text("SELECT rowid FROM files_fts WHERE files_fts MATCH :fts_query")
+            .bindparams(fts_query=fts_query)
+            .columns(rowid=Integer)
+        )
+
+    def _trigram_search(self, terms: list[str]) -> Optional[list[int]]:
+        """
+        Ids of files matching all terms, or None when the trigram index can't narrow the search:
+        it isn't built yet, no term has 3 characters, or too many paths remain for an id filter.
+        """
+        self.index_mutex.lock()
+        try:
+            if not (self.trigram_index.is_built and self.path_catalog.is_loaded):
+                return None
+            slots = self.trigram_index.search(terms, self.path_catalog, TRIGRAM_MAX_ID_FILTER)
+            if slots is None:
+                return None
+            return [self.path_catalog.file_id(slot) for slot in slots]
+        finally:
+            self.index_mutex.unlock()
+
+    def load_path_catalog(self):
+        """
+        Load every indexed file into a new resident path catalog and build the search mode's
+        in-memory index (trigram index or fuzzy matcher) over it.
+
+        Both are built without index_mutex, so searches keep using the previous ones (or the
+        LIKE scan) meanwhile, and are swapped in at the end. Must run on the writer thread:
+        rows written while the catalog loads would be missing from it.
+        Does nothing in search modes that don't use the catalog.
+        """
+        if self.search_mode not in CATALOG_SEARCH_MODES:
+            return
+        catalog = PathCatalog()
+        session = self.get_read_session()
+        try:
+            print("Loading path catalog...")
+            rows = (
+                session.query(File.id, File.file_path, File.file_size, File.mtime_ns)
+                .order_by(File.id)
+                .yield_per(50000)
+            )
+            catalog.load(rows)
+        except SQLAlchemyError as e:
+            raise Exception(f"Failed to load path catalog: {str(e)}")
+        finally:
+            session.close()
+        usage = catalog.memory_usage()
+        print(
+            f"Path catalog loaded: {len(catalog)} files, "
+            f"{usage['total'] / 1024 / 1024:.1f} MB "
+            f"({catalog.folder_count} folders)"
+        )
+
+        trigram_index = TrigramIndex()
+        if self.search_mode == 'trigram':
+            print("Building trigram search index...")
+            trigram_index.build(catalog.iter_slots())
+            print(
+                f"Trigram search index built: {len(catalog)} files, "
+                f"{trigram_index.memory_usage() / 1024 / 1024:.1f} MB"
+            )
+        fuzzy_matcher = FuzzyMatcher()
+        if self.search_mode == 'fuzzy':
+            print("Building fuzzy search catalog...")
+            fuzzy_matcher.build(catalog)
+            print(f"Fuzzy search catalog built: {len(catalog)} files")
+
+        self.index_mutex.lock()
+        try:
+            self.path_catalog = catalog
+            self.trigram_index = trigram_index
+            self.fuzzy_matcher = fuzzy_matcher
+        finally:
+            self.index_mutex.unlock()
+
+    def update_search_index(self, files_info: List[dict], file_ids: List[int]):
+        """Add or refresh path catalog, trigram index and fuzzy matcher entries for files just written with file_ids."""
+        self.index_mutex.lock()
+        try:
+            if not self.path_catalog.is_loaded:
+                return
+            for file_id, file_info in zip(file_ids, files_info):
+                file_path = file_info['path']
+                # A rescanned file keeps its path, so only its size and mtime change
+                old_slot = self.path_catalog.slot_of(file_id)
+                path_changed = old_slot is None or self.path_catalog.path(old_slot) != file_path
+                # The fuzzy matcher visits files newest first, so a new mtime moves the file as well
+                moved = path_changed or self.path_catalog.mtime(old_slot) != file_info['mtime_ns']
+                slot = self.path_catalog.add(file_id, file_path, file_info['file_size'], file_info['mtime_ns'])
+                if path_changed and self.trigram_index.is_built:
+                    self.trigram_index.add(slot, file_path)
+                if moved and self.fuzzy_matcher.is_built:
+                    self.fuzzy_matcher.add(slot, file_path)
+        finally:
+            self.index_mutex.unlock()
+
+        if self.fuzzy_matcher.needs_rebuild:
+            # Only this thread changes the catalog, so it is read without index_mutex meanwhile
+            fuzzy_matcher = FuzzyMatcher()
+            fuzzy_matcher.build(self.path_catalog)
+            self.index_mutex.lock()
+            try:
+                self.fuzzy_matcher = fuzzy_matcher
+            finally:
+                self.index_mutex.unlock()
 
     def cleanup_connections(self):
         """Clean up database connections and reset connection pool."""
         self.db_mutex.lock()
         try:
             if self.engine:
-                # Close all connections in the pool
+                # Close all connections in the pools
                 self.engine.dispose()
-                # Recreate the engine to reset the connection pool
-                db_path = Path(__file__).parent.joinpath(f"{os.getlogin()}_files.db")
-                self.engine = create_engine(
-                    f"sqlite:///{db_path}",
-                    echo=False,
-                    pool_pre_ping=True,
-                    pool_recycle=3600,
-                    pool_timeout=30,
-                    max_overflow=10
-                )
-                self.SessionLocal = sessionmaker(
-                    autocommit=False, autoflush=False, bind=self.engine
-                )
+                if self.read_engine:
+                    self.read_engine.dispose()
+                # Recreate the engines to reset the connection pools
+                self.engine = self._create_engine()
+                self._open_sessions()
         finally:
             self.db_mutex.unlock()
 
@@ -387,5 +1195,9 @@ class DatabaseManager:
                 self.engine.dispose()
                 self.engine = None
                 self.SessionLocal = None
+            if self.read_engine:
+                self.read_engine.dispose()
+                self.read_engine = None
+                self.ReadSessionLocal = None
         finally:
             self.db_mutex.unlock()
@@ -1,25 +1,36 @@
 from typing import List, Dict, Any
 from PySide6.QtCore import Signal, QObject, Slot
-from .database import DatabaseManager, DbRequest
-from .utils import ScanInfo
-import threading
-import time  # noqa: F401
+from .database import DatabaseManager, DbRequest, SearchCancelled, SearchMode
+from .utils import ScanInfo, GenerationCounter
+from .query_refine import QueryRefiner
+from .frecency import get_access_recorder
+from .telemetry import get_scan_telemetry
+import time
+
+# Rows per page of search results; further pages load as the list is scrolled
+SEARCH_PAGE_SIZE = 200
+# Largest result set whose (id, path) pairs are fetched after the first page of a search;
+# later keystrokes that narrow the search are answered from them in memory
+REFINE_CANDIDATE_LIMIT = 5000
+# Search engine: 'fts' (SQLite FTS5 trigram table) or 'like' (table scan) search on disk;
+# 'trigram' (substring) and 'fuzzy' (fzf-style ranking) keep a resident path catalog and index
+SEARCH_MODE: SearchMode = 'fts'
 
 
 class DatabaseWorker(QObject):
-    """Worker that runs in a separate thread to handle database operations"""
+    """Worker that runs in a separate thread to handle database writes; searches run on a DatabaseReader"""
 
-    batchUpdateCompleted = Signal(int)  # number of files updated
-    favoritesReady = Signal(list)  # list of favorites
+    batchUpdateCompleted = Signal(int, int)  # number of files updated, chunks merged into the batch
     foldersToScan = Signal(ScanInfo)
-    searchResultsReady = Signal(list)  # search results
     operationError = Signal(str, str)  # operation, error_message
     responseReady = Signal(str, dict)  # type: ignore # requestId, result
     errorOccurred = Signal(str, dict)  # requestId, error
+    tableChanged = Signal(str)  # table name
 
     def __init__(self):
         super().__init__()
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(search_mode=SEARCH_MODE)
+        self.telemetry = get_scan_telemetry()
 
     @Slot()
     def cleanup_database_connections(self):
@@ -31,74 +42,64 @@ class DatabaseWorker(QObject):
             print(f"Error cleaning up database connections: {e}")
             self.operationError.emit("cleanup_database_connections", str(e))
 
-    @Slot(list)
-    def batch_file_table_update(self, files_info: List[Dict[str, Any]], paths_to_delete: list[str]):
-        """Handle batch file update request"""
+    @Slot(list, list, int)
+    def batch_file_table_update(self, files_info: List[Dict[str, Any]], paths_to_delete: list[str], chunks: int = 1):
+        """Handle batch file update request; completion is signalled once per batch, also when it fails"""
 
-        self.db_manager.bulk_delete_files(paths_to_delete)
+        batch_started = time.perf_counter()
+        files_updated = 0
         try:
-            from .database import File
-
-            session = self.db_manager.get_session()
-            try:
-                files_updated = 0
-                batch_size = 1000
-
-                # Process files in batches of 1000
-                for i in range(0, len(files_info), batch_size):
-                    batch = files_info[i : i + batch_size]
-
-                    for file_info in batch:
-                        # Check if file already exists
-                        existing_file = session.query(File).filter(File.file_path == file_info["path"]).first()
-                        if existing_file:
-                            # Update existing file
-                            existing_file.file_size = file_info["file_size"]
-                            existing_file.last_modified_date = file_info["modified_time"]
-                        else:
-                            # Create new file record
-                            new_file = File(
-                                file_path=file_info["path"],
-                                file_size=file_info["file_size"],
-                                last_modified_date=file_info["modified_time"],
-                                scan_folder=file_info["scan_folder"],
-                            )
-                            session.merge(new_file)
-                        files_updated += 1
-
-                    # Commit each batch with proper mutex handling
-                    thread_id = threading.current_thread().ident
-                    print(f"thread {thread_id} about to commit batch {i // batch_size + 1} with {len(batch)} files")
-                    try:
-                        self.db_manager.db_mutex.lock()
-                        session.commit()
-                    finally:
-                        self.db_manager.db_mutex.unlock()
-
-                self.batchUpdateCompleted.emit(files_updated)
-
-            except Exception as e:
-                session.rollback()
-                raise e
-            finally:
-                session.close()
+            self.db_manager.bulk_delete_files(paths_to_delete)
+            # One set-based statement per batch instead of a lookup and an ORM object per file;
+            # it also updates the path catalog and in-memory indexes when they are loaded
+            commit_started = time.perf_counter()
+            files_updated = self.db_manager.upsert_files(files_info)
+            if files_updated:
+                self.telemetry.record_commit(time.perf_counter() - commit_started, files_updated)
+            self.telemetry.record_batch(time.perf_counter() - batch_started, files_updated + len(paths_to_delete))
         except Exception as e:
             print("error in db worker process batch commit")
             print(e)
             self.operationError.emit("batch_file_table_update", str(e))
+        finally:
+            # The deletions may have been committed even if the upsert failed
+            self.db_manager.result_cache.invalidate()
+        # The scanner counts the chunks as written either way, so a failed batch can't stall the scan
+        self.batchUpdateCompleted.emit(files_updated, chunks)
 
     @Slot()
-    def get_favorites(self):
-        """Get all favorites"""
+    def load_path_catalog(self):
+        """Load the resident path catalog from the files table"""
         try:
-            favorites = self.db_manager.get_favorites()
-            self.favoritesReady.emit(favorites)
+            self.db_manager.load_path_catalog()
         except Exception as e:
-            print(f"Error getting favorites: {e}")
-            self.operationError.emit("get_favorites", str(e))
+            print(f"Error loading path catalog: {e}")
+            self.operationError.emit("load_path_catalog", str(e))
 
     @Slot()
-    def getFoldersForScan(self):
+    def flush_file_accesses(self):
+        """Write file opens recorded since the last flush and update frecency scores"""
+        accesses = get_access_recorder().drain()
+        if not accesses:
+            return
+        try:
+            self.db_manager.record_file_accesses(accesses)
+        except Exception as e:
+            print(f"Error recording file accesses: {e}")
+            self.operationError.emit("flush_file_accesses", str(e))
+
+    @Slot()
+    def checkpoint_wal(self):
+        """Checkpoint the write-ahead log"""
+        try:
+            self.db_manager.checkpoint_wal()
+        except Exception as e:
+            print(f"Error checkpointing database: {e}")
+            self.operationError.emit("checkpoint_wal", str(e))
+
+    @Slot(bool)
+    def getFoldersForScan(self, scan_all: bool = True):
+        """Collect the folders to scan: every indexed folder, or only those the rescan scheduler says are due"""
         # folders = self.db_manager.get_folders_to_index()
         self.db_manager.delete_removed()
         folders = self.db_manager._sql_command(
@@ -106,38 +107,51 @@ class DatabaseWorker(QObject):
         )["result"]  # type: ignore
         if not folders:
             return
-        folders = [x[0] for x in folders]  # type: ignore
-        folders.append('recent_files')
-        folders_dict = {}
-
-        for f in folders:
-            folders_dict[f] = self.db_manager.get_files_for_scan_folder(f)
-
-        for k, v in folders_dict.items():
-            print(f'{k}, {len(v)}')
-
+        all_folders = [x[0] for x in folders]  # type: ignore
+        folders = all_folders if scan_all else self.db_manager.get_scan_folders_due(all_folders)
+        print(f'{len(folders)} of {len(all_folders)} folders due for scan')
+        # Sent even when no root is due: recent files are always rescanned, and the scan starts
+        # the folder watch of every root, which after a restart nothing else would
+        folders = folders + ['recent_files']
 
+        # Prior state is read by each root's scan as it starts instead of being loaded here up front
         scan_info = ScanInfo(
-            folders_to_scan=folders_dict,
+            folders_to_scan=folders,
             folders_to_ignore=[
                 x[0]
                 for x in self.db_manager._sql_command(
                     {"command": "sql_command", "sql": "select file_path from ignore_folders"} # type: ignore
                 )["result"]
             ],  # type: ignore
+            ignore_patterns=[
+                x[0]
+                for x in self.db_manager._sql_command(
+                    {"command": "sql_command", "sql": "select pattern from ignore_patterns"} # type: ignore
+                )["result"]
+            ],  # type: ignore
+            folders_to_watch=all_folders,
+            load_prior_state=self.db_manager.get_prior_state,
         )
 
         self.foldersToScan.emit(scan_info)
 
-    @Slot(str, int)
-    def search_files(self, search_term: str, limit: int = 1000):
-        """Search for files"""
+    @Slot(dict)
+    def record_scan_telemetry(self, snapshot: dict):
+        """Store the telemetry snapshot of a completed scan"""
         try:
-            results = self.db_manager.get_files_by_search(search_term, limit)
-            self.searchResultsReady.emit(results)
+            self.db_manager.record_scan_telemetry(snapshot)
         except Exception as e:
-            print(f"Error searching files: {e}")
-            self.operationError.emit("search_files", str(e))
+            print(f"Error recording scan telemetry: {e}")
+            self.operationError.emit("record_scan_telemetry", str(e))
+
+    @Slot(dict)
+    def record_root_scan(self, result: dict):
+        """Store per-root scan results used to schedule rescans"""
+        try:
+            self.db_manager.record_root_scan(**result)
+        except Exception as e:
+            print(f"Error recording scan history: {e}")
+            self.operationError.emit("record_root_scan", str(e))
 
     @Slot(str, dict)
     def process_request(self, request_id: str, request: DbRequest):
@@ -147,8 +161,166 @@ class DatabaseWorker(QObject):
                 "sql_command": self.db_manager._sql_command,
             }
 
+            # Table edits invalidate the result cache, and with it the reader's refinable result set
             result = handlers[request["command"]](request)
             self.responseReady.emit(request_id, result)
+            # Reads go to the reader thread, so anything showing this table is re-read once the edit is committed
+            if request.get("table"):
+                self.tableChanged.emit(request["table"])
 
         except Exception as e:
             self.errorOccurred.emit(request_id, {"error": str(e)})
+
+
+class DatabaseReader(QObject):
+    """
+    Worker for searches, favorites and SELECT requests, on its own thread and on query-only connections.
+    It shares the writer's DatabaseManager, so searches keep using the in-memory indexes the writer updates,
+    but never wait for a scan batch to commit.
+    """
+
+    favoritesReady = Signal(list)  # list of favorites
+    searchResultsReady = Signal(list, int, bool)  # first page of results, search generation, has more
+    moreResultsReady = Signal(list, int, bool)  # next page of results, search generation, has more
+    operationError = Signal(str, str)  # operation, error_message
+    responseReady = Signal(str, dict)  # type: ignore # requestId, result
+    errorOccurred = Signal(str, dict)  # requestId, error
+
+    def __init__(self, db_manager: DatabaseManager):
+        super().__init__()
+        self.db_manager = db_manager
+        self.query_refiner = QueryRefiner()
+        # Bumped by the UI thread for every new search; older queued searches are dropped
+        self.search_generation = GenerationCounter()
+        self._reset_pager()
+
+    def _reset_pager(self, search_term: str = "", page_size: int = 0, generation: int = 0):
+        """Forget the paging state of the previous search"""
+        self._page_term = search_term
+        self._page_size = page_size
+        self._page_generation = generation
+        self._page_buffer: list = []  # rows fetched from the database but not sent yet
+        self._page_ids: list[int] = []  # ids of a refined result set whose rows are not fetched yet
+        self._page_cursor = None  # keyset position of the last fetched row
+        self._page_sent = 0
+        self._page_exhausted = True
+
+    def _buffer_rows(self, rows: list, requested: int):
+        """Append fetched rows to the page buffer and advance the keyset cursor"""
+        self._page_buffer.extend(rows)
+        if rows:
+            self._page_cursor = self.db_manager.search_cursor(rows[-1])
+        self._page_exhausted = len(rows) < requested
+
+    def _next_page(self) -> tuple[list, bool]:
+        """Take the next page from the buffer; returns (rows, has_more)"""
+        missing = self._page_size - len(self._page_buffer)
+        if missing > 0 and self._page_ids:
+            self._page_buffer.extend(self.db_manager.get_files_by_ids(self._page_ids[:missing]))
+            self._page_ids = self._page_ids[missing:]
+        page = self._page_buffer[: self._page_size]
+        self._page_buffer = self._page_buffer[self._page_size :]
+        self._page_sent += len(page)
+        return page, bool(self._page_buffer) or bool(self._page_ids) or not self._page_exhausted
+
+    def _remember_candidates(self, search_term: str, data_generation: int, is_cancelled):
+        """Fetch the (id, path) set of a search whose first page did not hold every result, for refining"""
+        candidates = self.db_manager.get_search_candidates(search_term, REFINE_CANDIDATE_LIMIT, is_cancelled=is_cancelled)
+        self.query_refiner.remember(
+            search_term, candidates or [], complete=candidates is not None, generation=data_generation
+        )
+
+    @Slot()
+    def get_favorites(self):
+        """Get all favorites"""
+        try:
+            favorites = self.db_manager.get_favorites()
+            self.favoritesReady.emit(favorites)
+        except Exception as e:
+            print(f"Error getting favorites: {e}")
+            self.operationError.emit("get_favorites", str(e))
+
+    @Slot(str, int, int)
+    def search_files(self, search_term: str, page_size: int = SEARCH_PAGE_SIZE, generation: int = 0):
+        """Search for files and send the first page, narrowing the previous result set in memory when possible"""
+        def is_stale():
+            return not self.search_generation.is_current(generation)
+
+        if is_stale():
+            return
+        self._reset_pager(search_term, page_size, generation)
+        needs_candidates = False
+        try:
+            if self.db_manager.search_mode == 'fuzzy':
+                # Fuzzy ranking reorders results, so a substring-narrowed set would be out of order
+                self._buffer_rows(
+                    self.db_manager.get_files_by_search(search_term, page_size + 1, is_cancelled=is_stale),
+                    page_size + 1,
+                )
+            else:
+                # Read before searching, so a write committed meanwhile retires the fetched set
+                data_generation = self.db_manager.result_cache.generation
+                candidates = self.query_refiner.refine(search_term, data_generation)
+                if candidates is not None:
+                    self._page_ids = [file_id for file_id, _ in candidates]
+                else:
+                    results = self.db_manager.get_files_by_search(search_term, page_size + 1, is_cancelled=is_stale)
+                    self._buffer_rows(results, page_size + 1)
+                    if self._page_exhausted:
+                        # The first page holds every result, so it is the candidate set for narrower searches
+                        candidates = [(row[0].id, row[0].file_path) for row in results]
+                        self.query_refiner.remember(search_term, candidates, complete=True, generation=data_generation)
+                    else:
+                        needs_candidates = True
+            if is_stale():
+                return
+            page, has_more = self._next_page()
+            self.searchResultsReady.emit(page, generation, has_more)
+            # Only after the first page is out; the next keystroke cancels it through is_stale
+            if needs_candidates:
+                self._remember_candidates(search_term, data_generation, is_stale)
+        except SearchCancelled:
+            return
+        except Exception as e:
+            print(f"Error searching files: {e}")
+            self.operationError.emit("search_files", str(e))
+
+    @Slot(int)
+    def fetch_more_results(self, generation: int):
+        """Send the next page of the current search"""
+        def is_stale():
+            return not self.search_generation.is_current(generation)
+
+        if is_stale() or generation != self._page_generation:
+            return
+        try:
+            if len(self._page_buffer) < self._page_size and not self._page_exhausted:
+                if self.db_manager.search_mode == 'fuzzy':
+                    # Fuzzy scores are not stored, so re-rank with a larger limit and skip what was already sent
+                    requested = self._page_sent + self._page_size + 1
+                    rows = self.db_manager.get_files_by_search(self._page_term, requested, is_cancelled=is_stale)
+                    self._page_buffer = rows[self._page_sent :]
+                    self._page_exhausted = len(rows) < requested
+                else:
+                    rows = self.db_manager.get_files_by_search(
+                        self._page_term, self._page_size, is_cancelled=is_stale, after=self._page_cursor
+                    )
+                    self._buffer_rows(rows, self._page_size)
+            if is_stale():
+                return
+            page, has_more = self._next_page()
+            self.moreResultsReady.emit(page, generation, has_more)
+        except SearchCancelled:
+            return
+        except Exception as e:
+            print(f"Error fetching more search results: {e}")
+            self.operationError.emit("fetch_more_results", str(e))
+
+    @Slot(str, dict)
+    def process_request(self, request_id: str, request: DbRequest):
+        """Answer a SELECT sql_command"""
+        try:
+            result = self.db_manager._select(request.get("sql") or "")
+            self.responseReady.emit(request_id, result)
+        except Exception as e:
+            self.errorOccurred.emit(request_id, {"error": str(e)})
@@ -1,3 +1,4 @@
+import datetime
 import os
 import random
 from typing import List, Dict, Any, Optional
@@ -23,15 +24,30 @@ class FileListModel(QAbstractListModel):
     searchError = Signal(str)  # error message
     
     # Signals for communicating with database worker
+    fetchMoreRequested = Signal()  # the view scrolled to the end of the loaded rows
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._files = []
+        self._has_more = False  # the current search has rows that are not loaded yet
+        self._fetch_pending = False
         
     def rowCount(self, parent=None):
         if parent is None:
             parent = QModelIndex()
         return len(self._files)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._has_more and not self._fetch_pending
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Ask the database worker for the next page; rows arrive in on_more_results."""
+        if not self.canFetchMore(parent):
+            return
+        self._fetch_pending = True
+        self.fetchMoreRequested.emit()
     
     @Slot(int, result=str)
     def get_full_path(self, row):
@@ -109,6 +125,8 @@ class FileListModel(QAbstractListModel):
     def clear(self):
         self.beginResetModel()
         self._files.clear()
+        self._has_more = False
+        self._fetch_pending = False
         self.endResetModel()
         
     def _update_aliases_and_favorites(self):
@@ -153,39 +171,68 @@ class FileListModel(QAbstractListModel):
             
         return f"{size:.1f} {size_names[i]}"
         
-    def formatLastModified(self, timestamp: str) -> str:
-        return timestamp
+    def formatLastModified(self, mtime_ns: int) -> str:
+        return datetime.datetime.fromtimestamp(mtime_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S')
         
     
-    @Slot(list)
-    def on_search_results(self, results):
+    def _to_file_data(self, results) -> List[Dict[str, Any]]:
+        """Convert database result rows to model format"""
+        files = []
+        for file_obj, is_favorite, *_ in results:
+            file_data = {
+                'filename': os.path.basename(file_obj.file_path),
+                'parent_folder': os.path.dirname(file_obj.file_path),
+                'full_path': file_obj.file_path,
+                'size': self.formatFileSize(file_obj.file_size),
+                'last_modified': self.formatLastModified(file_obj.mtime_ns),
+                'favorite': bool(is_favorite),
+                'name_alias': None,
+                'is_folder': False  # Files from database are not folders
+            }
+            files.append(file_data)
+        return files
+
+    @Slot(list, bool)
+    def on_search_results(self, results, has_more=False):
+        """Replace the rows with the first page of a new search"""
         try:
-            # Convert database results to model format
-            files = []
-            for file_obj, is_favorite in results:
-                file_data = {
-                    'filename': os.path.basename(file_obj.file_path),
-                    'parent_folder': os.path.dirname(file_obj.file_path),
-                    'full_path': file_obj.file_path,
-                    'size': self.formatFileSize(file_obj.file_size),
-                    'last_modified': file_obj.last_modified_date,
-                    'favorite': bool(is_favorite),
-                    'name_alias': None,
-                    'is_folder': False  # Files from database are not folders
-                }
-                files.append(file_data)
-                
+            files = self._to_file_data(results)
+            self._has_more = has_more
+            self._fetch_pending = False
             self.setFiles(files)
         except Exception as e:
             print(f"Search results processing error: {e}")
             self.searchError.emit(str(e))
             self.clear()
+
+    @Slot(list, bool)
+    def on_more_results(self, results, has_more):
+        """Append the next page of the current search"""
+        self._fetch_pending = False
+        try:
+            files = self._to_file_data(results)
+            if files:
+                first = len(self._files)
+                self.beginInsertRows(QModelIndex(), first, first + len(files) - 1)
+                self._files.extend(files)
+                self.endInsertRows()
+            self._has_more = has_more
+        except Exception as e:
+            print(f"Search results processing error: {e}")
+            self._has_more = False
+            self.searchError.emit(str(e))
     
     def on_operation_error(self, operation: str, error: str):
         if operation == "search_files":
             print(f"Search error: {error}")
             self.searchError.emit(error)
             self.clear()
+        elif operation == "fetch_more_results":
+            # Keep the rows already shown, but stop asking for more
+            print(f"Search error: {error}")
+            self._has_more = False
+            self._fetch_pending = False
+            self.searchError.emit(error)
     
 
     
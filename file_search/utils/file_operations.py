@@ -11,6 +11,8 @@ import subprocess
 import random
 import pyperclip
 
+from .frecency import get_access_recorder
+
 from pygments import highlight
 from pygments.lexers import guess_lexer, get_lexer_by_name
 from pygments.formatters import HtmlFormatter
@@ -141,8 +143,14 @@ class FileOps(QObject):
     
     @Slot(str)
     def openFile(self, file_path: str):
+        get_access_recorder().record(file_path)
         os.startfile(file_path)
 
+    @Slot(str)
+    def recordAccess(self, file_path: str):
+        """Count a file opened inside the app (e.g. in the preview viewer) towards its frecency"""
+        get_access_recorder().record(file_path)
+
     @Slot(str)
     def revealInExplorer(self, file_path: str):
         subprocess.run(['explorer', '/select,', file_path])
@@ -0,0 +1,60 @@
+"""
+Frecency (frequency + recency) bookkeeping for opened files.
+
+Scores are stored in log space relative to a fixed epoch: every access adds
+2 ** ((t - epoch) / half_life) to a file's running total. Because all totals decay by
+the same factor as time passes, their order never changes between accesses, so stored
+scores can be ranked directly without being rewritten as they age.
+"""
+
+import datetime
+import math
+import threading
+import time
+
+FRECENCY_HALF_LIFE_DAYS = 14
+FRECENCY_EPOCH = datetime.datetime(2024, 1, 1).timestamp()
+
+_LOG_GROWTH_PER_SECOND = math.log(2) / (FRECENCY_HALF_LIFE_DAYS * 24 * 60 * 60)
+
+
+def access_weight(timestamp: float) -> float:
+    """Log-space weight of a single access at timestamp."""
+    return (timestamp - FRECENCY_EPOCH) * _LOG_GROWTH_PER_SECOND
+
+
+def add_access(score: float | None, timestamp: float) -> float:
+    """Return score with an access at timestamp added (log-sum-exp of the two terms)."""
+    weight = access_weight(timestamp)
+    if score is None:
+        return weight
+    high, low = max(score, weight), min(score, weight)
+    return high + math.log1p(math.exp(low - high))
+
+
+class AccessRecorder:
+    """Thread-safe buffer of file opens, flushed to the database in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, float]] = []
+
+    def record(self, file_path: str):
+        with self._lock:
+            self._pending.append((file_path, time.time()))
+
+    def drain(self) -> list[tuple[str, float]]:
+        """Return and clear all accesses recorded since the last drain."""
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+        return pending
+
+
+# Global access recorder instance, shared by the UI thread and the database worker
+_access_recorder = AccessRecorder()
+
+
+def get_access_recorder():
+    """Get the global access recorder instance"""
+    return _access_recorder
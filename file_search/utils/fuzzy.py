@@ -0,0 +1,349 @@
+"""
+Fuzzy subsequence matching in the style of fzf.
+Scores subsequence matches of a query against the paths of the path catalog and keeps
+only the best results in a bounded heap instead of sorting every match.
+Candidates come from per-bit presence sets over the paths ordered newest first, so the
+character and character pair filters run as big-integer operations rather than per path.
+"""
+
+import heapq
+import re
+import sys
+from array import array
+from contextlib import nullcontext
+from functools import lru_cache, reduce
+from itertools import islice, product
+from operator import or_
+from typing import Callable, ContextManager, Iterable, Iterator, Optional
+
+from .path_catalog import PathCatalog, split_path
+
+SCORE_MATCH = 16
+BONUS_CONSECUTIVE = 8  # match directly after the previous matched character
+BONUS_SEPARATOR = 10  # match right after a path separator
+BONUS_BOUNDARY = 7  # match at the start of a word inside a path component
+BONUS_BASENAME = 12  # match inside the file name rather than the folder
+PENALTY_GAP = 3  # each jump between non-adjacent matched characters
+
+# Slots scored per lock hold, and between checks for a superseded search
+SEARCH_CHUNK = 5000
+
+# (matches scored, candidates checked) per candidate tier before the search moves on to the next.
+# Tiers are visited newest first, so a tier cut short leaves out its oldest files; a search
+# that stays within every budget ranks all matches.
+TIER_BUDGETS = ((3000, 8000), (1000, 3000), (300, 2000))
+
+# Paths added or changed since the last build are scored on every search; once there are more
+# than this many, or more than the paths in the build, the matcher wants rebuilding
+REBUILD_PENDING = 50000
+
+PATH_SEPARATORS = '\\/'
+WORD_DELIMITERS = ' _-.'
+
+# Mask bits: a letter or digit anywhere in the path, a bucket for each pair of adjacent
+# characters anywhere in the path, and both again for the file name alone
+_ALNUM = b'abcdefghijklmnopqrstuvwxyz0123456789'
+PAIR_SHIFT = len(_ALNUM)
+PAIR_BUCKETS = 128
+NAME_SHIFT = PAIR_SHIFT + PAIR_BUCKETS
+MASK_BITS = 2 * NAME_SHIFT
+_CHARS = (1 << PAIR_SHIFT) - 1
+
+_NONZERO = re.compile(rb'[^\x00]')
+_BIT_POSITIONS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+_BIT_TABLES = [bytes(byte >> i & 1 for byte in range(256)) for i in range(8)]
+
+
+def _char_bits() -> list[int]:
+    """Mask bit of every byte value; 0 for bytes that are not a letter or digit."""
+    bits = [0] * 256
+    for i, byte in enumerate(_ALNUM):
+        bits[byte] = 1 << i
+    return bits
+
+
+def _pair_bits() -> list[int]:
+    """Mask bit of every pair of adjacent bytes, indexed the way a native 16-bit view reads them."""
+    bits = [0] * 65536
+    pair_chars = _ALNUM + (PATH_SEPARATORS + WORD_DELIMITERS).encode()
+    for n, pair in enumerate(product(pair_chars, repeat=2)):
+        bits[int.from_bytes(bytes(pair), sys.byteorder)] = 1 << (PAIR_SHIFT + n % PAIR_BUCKETS)
+    return bits
+
+
+_CHAR_BITS = _char_bits()
+_PAIR_BITS = _pair_bits()
+
+
+def text_mask(lowered: str) -> int:
+    """Character and adjacent-pair bits of lowered."""
+    encoded = lowered.encode('utf-8')
+    mask = reduce(or_, map(_CHAR_BITS.__getitem__, set(encoded)), 0)
+    if len(encoded) > 1:
+        # 16-bit views from an even and an odd offset hold every pair of adjacent bytes
+        pairs = set(memoryview(encoded[: len(encoded) & ~1]).cast('H'))
+        pairs.update(memoryview(encoded[1 : 1 + ((len(encoded) - 1) & ~1)]).cast('H'))
+        mask = reduce(or_, map(_PAIR_BITS.__getitem__, pairs), mask)
+    return mask
+
+
+def name_mask(directory: str, name: str) -> int:
+    """Mask bits of a file name, including the pair across the separator before it."""
+    mask = text_mask((directory[-1:] + name).lower())
+    return mask | mask << NAME_SHIFT
+
+
+def path_mask(file_path: str) -> int:
+    """Mask bits of a whole path."""
+    directory, name = split_path(file_path)
+    return text_mask(directory.lower()) | name_mask(directory, name)
+
+
+def _set_bits(bits: int, count: int) -> Iterator[int]:
+    """Positions of the set bits of bits, which is below 1 << count, lowest first."""
+    packed = bits.to_bytes((count + 7) // 8, 'little')
+    for match in _NONZERO.finditer(packed):
+        start = match.start()
+        base = start * 8
+        for i in _BIT_POSITIONS[packed[start]]:
+            yield base + i
+
+
+@lru_cache(maxsize=256)
+def _run_bonus(term: str) -> int:
+    """Separator and boundary bonus of the characters after the first when term matches in one run."""
+    bonus = 0
+    for ch in term[:-1]:
+        if ch in PATH_SEPARATORS:
+            bonus += BONUS_SEPARATOR
+        elif ch in WORD_DELIMITERS:
+            bonus += BONUS_BOUNDARY
+    return bonus
+
+
+def fuzzy_score(terms: list[str], path: str, lowered: str, basename_start: int) -> Optional[int]:
+    """
+    Score of path for the lower-cased query terms, or None if any term is not a subsequence of it.
+
+    Mirrors fzf's v1 algorithm from the right: a backward scan finds where the right-most
+    complete match starts, so matches land in the file name whenever they fit there, then
+    a forward scan from that point pulls the match as tight as possible while scoring it.
+    """
+    total = 0
+    for term in terms:
+        start = len(lowered)
+        for ch in reversed(term):
+            start = lowered.rfind(ch, 0, start)
+            if start < 0:
+                return None
+
+        if lowered.startswith(term, start):
+            # The forward scan would take the run at start, every character after the first consecutive
+            end = start + len(term)
+            total += (SCORE_MATCH + BONUS_CONSECUTIVE) * len(term) - BONUS_CONSECUTIVE + _run_bonus(term)
+            if end > basename_start:
+                total += BONUS_BASENAME * (end - max(start, basename_start))
+            if start == 0 or lowered[start - 1] in PATH_SEPARATORS:
+                total += BONUS_SEPARATOR
+            elif lowered[start - 1] in WORD_DELIMITERS or (path[start - 1].islower() and path[start].isupper()):
+                total += BONUS_BOUNDARY
+            if path[start:end] != lowered[start:end]:
+                for p in range(start + 1, end):
+                    ch = lowered[p - 1]
+                    if ch not in PATH_SEPARATORS and ch not in WORD_DELIMITERS and path[p - 1].islower() and path[p].isupper():
+                        total += BONUS_BOUNDARY
+            continue
+
+        prev = -2
+        p = start - 1
+        for ch in term:
+            p = lowered.find(ch, p + 1)
+            score = SCORE_MATCH
+            if p == prev + 1:
+                score += BONUS_CONSECUTIVE
+            elif prev >= 0:
+                score -= PENALTY_GAP
+
+            if p == 0 or lowered[p - 1] in PATH_SEPARATORS:
+                score += BONUS_SEPARATOR
+            elif lowered[p - 1] in WORD_DELIMITERS or (path[p - 1].islower() and path[p].isupper()):
+                score += BONUS_BOUNDARY
+
+            if p >= basename_start:
+                score += BONUS_BASENAME
+            total += score
+            prev = p
+    return total
+
+
+class FuzzyMatcher:
+    """
+    Fuzzy ranking over the paths of the resident path catalog.
+
+    A build orders the live catalog rows newest first and keeps, for every mask bit, the set
+    of ranks whose path has it as one big integer. A search intersects those sets into three
+    candidate tiers: paths holding every term's characters and pairs, paths where each term
+    is either that or entirely among the file name's characters, and the remaining paths
+    holding every query character. Within a tier, paths whose file name holds more of the query
+    come first, then newer before older, and each tier is scored within TIER_BUDGETS.
+    Paths added or moved since the build, favorites and frecent files are always scored.
+    Paths, modification times and removed rows are read from the catalog.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self._order) + len(self._pending)
+
+    def clear(self):
+        """Drop all entries; the matcher must be rebuilt before it is used again."""
+        self._order = array('I')  # slot at each rank, newest first
+        self._presence: list[int] = []  # per mask bit, the ranks whose path has the bit
+        self._all = 0
+        # Slots added or changed since the build, with their masks; their ranks are stale
+        self._pending: dict[int, int] = {}
+        self.is_built = False
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True once so many paths are pending that every search spends most of its time on them."""
+        return self.is_built and len(self._pending) > max(REBUILD_PENDING, len(self._order))
+
+    def build(self, catalog: PathCatalog):
+        """Order the live rows of catalog newest first and build the presence sets of their masks."""
+        self.clear()
+        directory_masks: dict[str, int] = {}
+        masks = [0] * catalog.slot_count
+        slots = []
+        for slot, directory, name in catalog.iter_names():
+            directory_mask = directory_masks.get(directory)
+            if directory_mask is None:
+                directory_mask = directory_masks[directory] = text_mask(directory.lower())
+            masks[slot] = directory_mask | name_mask(directory, name)
+            slots.append(slot)
+        # Reversed first, so equal times keep the higher slot first as the ranking does
+        self._order = array('I', sorted(reversed(slots), key=catalog.mtime, reverse=True))
+        self._all = (1 << len(self._order)) - 1
+
+        width = (MASK_BITS + 7) // 8
+        packed = b''.join(masks[slot].to_bytes(width, 'little') for slot in self._order)
+        del masks
+        for bit in range(MASK_BITS):
+            # One 0/1 byte per rank, then every eighth of them shifted into place
+            column = packed[bit // 8 :: width].translate(_BIT_TABLES[bit % 8])
+            presence = 0
+            for i in range(8):
+                presence |= int.from_bytes(column[i::8], 'little') << i
+            self._presence.append(presence)
+        self.is_built = True
+
+    def add(self, slot: int, file_path: str):
+        """Add the path stored in slot, or note that its path or modification time changed."""
+        self._pending[slot] = path_mask(file_path)
+
+    def _ranks_with(self, bits: int) -> int:
+        """Set of the ranks whose mask has every bit in bits."""
+        ranks = self._all
+        while bits:
+            low = bits & -bits
+            ranks &= self._presence[low.bit_length() - 1]
+            bits ^= low
+        return ranks
+
+    def _tiers(self, terms: list[str]) -> list[list[int]]:
+        """
+        Candidate rank sets for terms, best prospects first; together they hold every match.
+        Each tier is split by the total length of the terms whose characters and pairs are all in
+        the file name, longest first.
+        """
+        masks = [text_mask(term) for term in terms]
+        everywhere = self._ranks_with(reduce(or_, masks) & _CHARS)
+        contiguous = everywhere & self._ranks_with(reduce(or_, masks))
+        in_name = everywhere
+        # weighed[w]: ranks where the terms whose characters and pairs are all in the file name are w characters long
+        weighed = [everywhere] + [0] * sum(map(len, terms))
+        for term, mask in zip(terms, masks):
+            name_chars = self._ranks_with((mask & _CHARS) << NAME_SHIFT)
+            in_name &= self._ranks_with(mask & ~_CHARS) | name_chars
+            name_run = name_chars & self._ranks_with((mask & ~_CHARS) << NAME_SHIFT)
+            for w in range(len(weighed) - 1, len(term) - 1, -1):
+                weighed[w] = weighed[w] & ~name_run | weighed[w - len(term)] & name_run
+            for w in range(len(term) - 1, -1, -1):
+                weighed[w] &= ~name_run
+        groups = [group for group in reversed(weighed) if group]
+        tiers = (contiguous, in_name & ~contiguous, everywhere & ~in_name & ~contiguous)
+        return [[tier & group for group in groups] for tier in tiers]
+
+    def search(
+        self,
+        catalog: PathCatalog,
+        search_term: str,
+        limit: int,
+        favorites: Optional[set[str]] = None,
+        frecency: Optional[dict[str, float]] = None,
+        boosted_ids: Iterable[int] = (),
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        lock: Callable[[], ContextManager] = nullcontext,
+    ) -> list[int]:
+        """
+        File ids of the best `limit` matches for search_term, best first.
+
+        Ties on score are broken by favorites first, then by frecency score, then by the
+        most recent modification date. boosted_ids, the files of favorites and frecency,
+        are scored whatever the tier budgets, so no tie they would win is left out.
+        Slots are scored SEARCH_CHUNK at a time, each chunk under lock(), so writers
+        updating the catalog wait for one chunk rather than the whole search.
+        If is_cancelled returns True the scan stops early and nothing is returned.
+        """
+        terms = search_term.lower().split()
+        if not terms or limit <= 0:
+            return []
+        favorites = favorites or set()
+        frecency = frecency or {}
+        never_opened = float('-inf')
+        heap: list[tuple] = []
+
+        def score_slots(slots: list[int], budget: int) -> int:
+            """Score slots into the heap until budget matches were found; returns the matches found."""
+            found = 0
+            for slot, path, basename_start in catalog.scan(slots):
+                score = fuzzy_score(terms, path, path.lower(), basename_start)
+                if score is None:
+                    continue
+                key = (score, path in favorites, frecency.get(path, never_opened), catalog.mtime(slot), slot)
+                if len(heap) < limit:
+                    heapq.heappush(heap, key)
+                elif key > heap[0]:
+                    heapq.heapreplace(heap, key)
+                found += 1
+                if found >= budget:
+                    break
+            return found
+
+        with lock():
+            order = self._order
+            tiers = self._tiers(terms)
+            query_chars = text_mask(''.join(terms)) & _CHARS
+            always = {slot for slot, mask in self._pending.items() if mask & query_chars == query_chars}
+            always.update(slot for slot in map(catalog.slot_of, boosted_ids) if slot is not None)
+            # Pending slots are out of place in the order, and the rest were scored already
+            skipped = always.union(self._pending)
+            score_slots(sorted(always), len(always))
+
+        for tier, (max_matches, max_checked) in zip(tiers, TIER_BUDGETS):
+            slots = (order[rank] for group in tier for rank in _set_bits(group, len(order)))
+            if skipped:
+                slots = (slot for slot in slots if slot not in skipped)
+            slots = islice(slots, max_checked)
+            while max_matches > 0:
+                if is_cancelled is not None and is_cancelled():
+                    return []
+                chunk = list(islice(slots, SEARCH_CHUNK))
+                if not chunk:
+                    break
+                with lock():
+                    max_matches -= score_slots(chunk, max_matches)
+
+        with lock():
+            return [catalog.file_id(key[-1]) for key in sorted(heap, reverse=True)]
@@ -0,0 +1,144 @@
+"""
+Ignore rules for scanning, compiled once per scan.
+Ignored folders become a trie of path components and glob patterns become extension and
+name sets plus one combined regex, so checking a path costs the same however many rules exist.
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterable, Optional
+
+# Patterns seeded into the ignore_patterns table when it is created
+DEFAULT_IGNORE_PATTERNS = ['*.pyc']
+
+_END = ''  # Trie key marking an ignored folder; never a real path component
+_WILDCARDS = '*?['
+_SEPARATORS = '\\/'
+_REGEX_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def path_components(path: str) -> list[str]:
+    """Components of the normalized path, case-folded where the file system ignores case."""
+    return [c for c in os.path.normcase(os.path.normpath(path)).split(os.sep) if c]
+
+
+class FolderTrie:
+    """Ignored folders as a trie of path components; a lookup walks one node per component."""
+
+    def __init__(self, folders: Iterable[str]):
+        self.root: dict = {}
+        for folder in folders:
+            node = self.root
+            for component in path_components(folder):
+                node = node.setdefault(component, {})
+            node[_END] = {}
+
+    def node_for(self, path: str) -> Optional[dict]:
+        """
+        Trie node for path, or None when no ignored folder lies at or below it.
+        The node of an ignored folder (or of anything inside one) contains the end marker.
+        """
+        node = self.root
+        for component in path_components(path):
+            node = node.get(component)
+            if node is None or _END in node:
+                return node
+        return node
+
+    def is_ignored(self, path: str) -> bool:
+        node = self.node_for(path)
+        return node is not None and _END in node
+
+    @staticmethod
+    def is_child_ignored(node: dict, name: str) -> bool:
+        """Check a directory entry by name against the trie node of its directory"""
+        child = node.get(os.path.normcase(name))
+        return child is not None and _END in child
+
+
+class PatternMatcher:
+    """
+    Glob patterns such as *.tmp, node_modules, ~$* or *\\build\\*.
+
+    *.ext patterns (a single suffix) become an extension set and plain names a name set;
+    other globs, *.tar.gz among them, are joined into a single regex. Patterns containing a path separator match the full path,
+    all others match the entry name.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.extensions: set[str] = set()
+        self.names: set[str] = set()
+        name_globs: list[str] = []
+        path_globs: list[str] = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if any(s in pattern for s in _SEPARATORS):
+                path_globs.append(os.path.normpath(pattern))
+            elif pattern.startswith('*.') and not any(c in pattern[2:] for c in _WILDCARDS + '.'):
+                # Case-folded only where the regex ignores case too
+                self.extensions.add(os.path.normcase(pattern[1:]))
+            elif not any(w in pattern for w in _WILDCARDS):
+                self.names.add(os.path.normcase(pattern))
+            else:
+                name_globs.append(pattern)
+        self._name_regex = self._compile(name_globs)
+        self._path_regex = self._compile(path_globs)
+        self.is_empty = not (self.extensions or self.names or name_globs or path_globs)
+
+    @staticmethod
+    def _compile(globs: list[str]) -> Optional[re.Pattern]:
+        if not globs:
+            return None
+        return re.compile('|'.join(fnmatch.translate(g) for g in globs), _REGEX_FLAGS)
+
+    def matches(self, name: str, path: str) -> bool:
+        if self.is_empty:
+            return False
+        if self.extensions:
+            # From the last dot, as '*.ext' matches it; unlike splitext this keeps '.ext' whole
+            dot = name.rfind('.')
+            if dot >= 0 and os.path.normcase(name[dot:]) in self.extensions:
+                return True
+        if self.names and os.path.normcase(name) in self.names:
+            return True
+        if self._name_regex is not None and self._name_regex.match(name):
+            return True
+        return self._path_regex is not None and self._path_regex.match(os.path.normpath(path)) is not None
+
+
+class IgnoreRules:
+    """Ignored folders (and anything below them) plus ignore patterns, compiled for one scan."""
+
+    def __init__(self, folders_to_ignore: Iterable[str], patterns: Iterable[str] = ()):
+        self.folders = FolderTrie(folders_to_ignore)
+        self.patterns = PatternMatcher(patterns)
+
+    def is_path_ignored(self, path: str) -> bool:
+        """Check if a path is, or is within, an ignored folder, or its name matches a pattern"""
+        return self.folders.is_ignored(path) or self.patterns.matches(os.path.basename(os.path.normpath(path)), path)
+
+    def is_path_ignored_below(self, root: str, path: str) -> bool:
+        """Check path and every folder between root and it, the way a walk from root would prune them"""
+        if self.folders.is_ignored(path):
+            return True
+        sub = root
+        for name in os.path.relpath(path, root).split(os.sep):
+            if name in ('', os.curdir):
+                continue
+            sub = os.path.join(sub, name)
+            if self.patterns.matches(name, sub):
+                return True
+        return False
+
+    def folder_node(self, directory: str) -> Optional[dict]:
+        """Trie node to pass to is_entry_ignored for the entries of directory"""
+        return self.folders.node_for(directory)
+
+    def is_entry_ignored(self, folder_node: Optional[dict], name: str, path: str) -> bool:
+        """Check one entry of a directory that is not itself ignored"""
+        if folder_node is not None and self.folders.is_child_ignored(folder_node, name):
+            return True
+        return self.patterns.matches(name, path)
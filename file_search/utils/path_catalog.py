@@ -0,0 +1,205 @@
+"""
+Compact, array-backed catalog of every indexed file path.
+Directories are interned once and basenames are packed into a single UTF-8 buffer, so a
+row costs a few fixed-width array entries instead of an ORM object or a dict.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+
+
+def split_path(file_path: str) -> tuple[str, str]:
+    """Split file_path into (directory including its trailing separator, basename)."""
+    cut = max(file_path.rfind('\\'), file_path.rfind('/')) + 1
+    return file_path[:cut], file_path[cut:]
+
+
+class PathCatalog:
+    """
+    Resident catalog of (file_id, file_path, file_size, mtime_ns) rows addressed by slot.
+
+    Rows loaded in file id order are found by binary search; removed rows leave an empty
+    slot until the catalog is reloaded.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return self._live_count
+
+    @property
+    def folder_count(self) -> int:
+        return len(self._dirs)
+
+    @property
+    def slot_count(self) -> int:
+        """Slots allocated so far, including removed rows."""
+        return len(self._file_ids)
+
+    def clear(self):
+        """Drop all rows; the catalog must be loaded before it is used again."""
+        self._dirs: list[str] = []
+        self._dir_index: dict[str, int] = {}
+        self._names = bytearray()  # basenames back to back
+        self._file_ids = array('q')
+        self._dir_of = array('I')
+        self._name_start = array('I')
+        self._name_len = array('H')
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        self._live = bytearray()
+        self._live_count = 0
+        # Slots before this hold ids in increasing order and are found by binary search;
+        # ids added out of order after that are looked up in _unsorted_slots
+        self._sorted_count = 0
+        self._unsorted_slots: dict[int, int] = {}
+        self.is_loaded = False
+
+    def load(self, rows: Iterable[tuple[int, str, int, int]]):
+        """Load the catalog from (file_id, file_path, file_size, mtime_ns) rows, ideally ordered by file_id."""
+        self.clear()
+        for file_id, file_path, file_size, mtime_ns in rows:
+            self.add(file_id, file_path, file_size, mtime_ns)
+        self.is_loaded = True
+
+    def _intern_dir(self, directory: str) -> int:
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_index[directory] = dir_id
+        return dir_id
+
+    def slot_of(self, file_id: int) -> Optional[int]:
+        """Slot holding file_id, or None if the file is not in the catalog."""
+        slot = self._find_slot(file_id)
+        return slot if slot is not None and self._live[slot] else None
+
+    def _find_slot(self, file_id: int) -> Optional[int]:
+        """Slot allocated to file_id, including removed rows."""
+        ids = self._file_ids
+        slot = bisect_left(ids, file_id, 0, self._sorted_count)
+        if slot < self._sorted_count and ids[slot] == file_id:
+            return slot
+        return self._unsorted_slots.get(file_id)
+
+    def add(self, file_id: int, file_path: str, file_size: int, mtime_ns: int) -> int:
+        """Add or replace the row for file_id; returns its slot, which stays the same when the row is replaced."""
+        directory, name = split_path(file_path)
+        dir_id = self._intern_dir(directory)
+        encoded = name.encode('utf-8')
+
+        ids = self._file_ids
+        if self._sorted_count == len(ids) and (not ids or file_id > ids[-1]):
+            # New largest id, the common case while loading in id order
+            slot = None
+        else:
+            slot = self._find_slot(file_id)
+        if slot is None:
+            slot = len(ids)
+            if self._sorted_count == slot and (not ids or file_id > ids[-1]):
+                self._sorted_count += 1
+            else:
+                self._unsorted_slots[file_id] = slot
+            ids.append(file_id)
+            self._dir_of.append(0)
+            self._name_start.append(0)
+            self._name_len.append(0)
+            self._sizes.append(0)
+            self._mtimes.append(0)
+            self._live.append(0)
+
+        start, length = self._name_start[slot], self._name_len[slot]
+        if not (self._live[slot] and self._names[start : start + length] == encoded):
+            # Changed names are appended; the old bytes are reclaimed on the next load
+            self._name_start[slot] = len(self._names)
+            self._name_len[slot] = len(encoded)
+            self._names += encoded
+        self._dir_of[slot] = dir_id
+        self._sizes[slot] = file_size
+        self._mtimes[slot] = mtime_ns
+        if not self._live[slot]:
+            self._live[slot] = 1
+            self._live_count += 1
+        return slot
+
+    def remove(self, file_id: int):
+        """Remove the row for file_id if it is in the catalog."""
+        slot = self.slot_of(file_id)
+        if slot is None:
+            return
+        self._live[slot] = 0
+        self._live_count -= 1
+
+    def is_live(self, slot: int) -> bool:
+        """False for slots whose row was removed."""
+        return self._live[slot] == 1
+
+    def file_id(self, slot: int) -> int:
+        return self._file_ids[slot]
+
+    def path(self, slot: int) -> str:
+        """Full path of the row in slot."""
+        start = self._name_start[slot]
+        name = self._names[start : start + self._name_len[slot]].decode('utf-8')
+        return self._dirs[self._dir_of[slot]] + name
+
+    def basename_start(self, slot: int) -> int:
+        """Index in path(slot) where the file name starts."""
+        return len(self._dirs[self._dir_of[slot]])
+
+    def mtime(self, slot: int) -> int:
+        return self._mtimes[slot]
+
+    def row(self, slot: int) -> tuple[int, str, int, int]:
+        """(file_id, file_path, file_size, mtime_ns) of the row in slot."""
+        return self._file_ids[slot], self.path(slot), self._sizes[slot], self._mtimes[slot]
+
+    def path_of(self, file_id: int) -> Optional[str]:
+        """Full path of file_id, or None if the file is not in the catalog."""
+        slot = self.slot_of(file_id)
+        return None if slot is None else self.path(slot)
+
+    def scan(self, slots: Iterable[int]) -> Iterator[tuple[int, str, int]]:
+        """(slot, file_path, basename start) of the live rows among slots; the bulk form of path()."""
+        live, dirs, dir_of = self._live, self._dirs, self._dir_of
+        names, name_start, name_len = self._names, self._name_start, self._name_len
+        for slot in slots:
+            if live[slot]:
+                directory = dirs[dir_of[slot]]
+                start = name_start[slot]
+                yield slot, directory + names[start : start + name_len[slot]].decode('utf-8'), len(directory)
+
+    def iter_slots(self) -> Iterator[tuple[int, str]]:
+        """(slot, file_path) of every row in the catalog, in slot order."""
+        for slot, live in enumerate(self._live):
+            if live:
+                yield slot, self.path(slot)
+
+    def iter_names(self) -> Iterator[tuple[int, str, str]]:
+        """(slot, directory, file name) of every row in the catalog, in slot order."""
+        dirs, dir_of = self._dirs, self._dir_of
+        names, name_start, name_len = self._names, self._name_start, self._name_len
+        for slot, live in enumerate(self._live):
+            if live:
+                start = name_start[slot]
+                yield slot, dirs[dir_of[slot]], names[start : start + name_len[slot]].decode('utf-8')
+
+    def memory_usage(self) -> dict[str, int]:
+        """Approximate bytes held by the catalog, by component."""
+        arrays = sum(
+            sys.getsizeof(a)
+            for a in (self._file_ids, self._dir_of, self._name_start, self._name_len, self._sizes, self._mtimes, self._live)
+        )
+        dirs = sys.getsizeof(self._dirs) + sys.getsizeof(self._dir_index) + sum(map(sys.getsizeof, self._dirs))
+        usage = {
+            'arrays': arrays,
+            'names': sys.getsizeof(self._names),
+            'dirs': dirs,
+            'unsorted': sys.getsizeof(self._unsorted_slots),
+        }
+        usage['total'] = sum(usage.values())
+        return usage
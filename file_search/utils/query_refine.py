@@ -0,0 +1,73 @@
+"""
+Incremental query refinement.
+Keeps the (id, path) pairs of the last complete search result set so that queries which
+only narrow it ("rep" -> "repo" -> "report") can be answered in memory instead of by the database.
+"""
+
+from typing import Optional
+
+
+def normalize_terms(search_term: str) -> list[str]:
+    """Split a search string into lower-cased terms, the way the database search does."""
+    return [t.lower() for t in search_term.strip().split()]
+
+
+def is_narrowing(previous_terms: list[str], new_terms: list[str]) -> bool:
+    """
+    True when every path matching new_terms also matches previous_terms.
+
+    That holds when each previous term is contained in at least one of the new terms.
+    """
+    return all(any(old in new for new in new_terms) for old in previous_terms)
+
+
+class QueryRefiner:
+    """Holds the last complete candidate set for a search and narrows it for later queries."""
+
+    def __init__(self):
+        self._terms: Optional[list[str]] = None
+        self._rows: list = []
+        self._generation: Optional[int] = None
+
+    def clear(self):
+        """Forget the stored candidate set, e.g. after the files table changed."""
+        self._terms = None
+        self._rows = []
+        self._generation = None
+
+    def remember(self, search_term: str, rows: list, complete: bool, generation: Optional[int] = None):
+        """
+        Store (file_id, file_path) rows, in result order, as the candidate set for search_term.
+
+        Only complete result sets (not cut off by a limit) can be narrowed later.
+        generation is the data generation (see ResultCache) read before the rows were fetched.
+        """
+        if not complete:
+            self.clear()
+            return
+        self._terms = normalize_terms(search_term)
+        self._rows = rows
+        self._generation = generation
+
+    def refine(self, search_term: str, generation: Optional[int] = None) -> Optional[list]:
+        """
+        (file_id, file_path) rows matching search_term, filtered from the stored candidate set.
+
+        Returns None when the query is not a narrowing of the stored one, or the data changed
+        since the set was fetched, and has to go to the database.
+        The narrowed set replaces the stored one, so each further keystroke filters fewer rows.
+        """
+        if generation != self._generation:
+            self.clear()
+            return None
+        new_terms = normalize_terms(search_term)
+        if self._terms is None or not new_terms or not is_narrowing(self._terms, new_terms):
+            return None
+
+        if new_terms != self._terms:
+            self._rows = [
+                row for row in self._rows
+                if all(t in row[1].lower() for t in new_terms)
+            ]
+            self._terms = new_terms
+        return self._rows
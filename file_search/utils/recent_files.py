@@ -24,12 +24,12 @@ class RecentFile:
                 if not  Path(self.path).exists():
                     return None
                 size = os.stat(self.path).st_size
-            mod = (datetime.now() + timedelta(days=-10)).strftime('%Y-%m-%d %H:%M:%S')
+            mod = datetime.now() + timedelta(days=-10)
             if self.timespamp:
-                mod = self.timespamp.strftime('%Y-%m-%d %H:%M:%S')
+                mod = self.timespamp
             return {
                 'path': self.path,
-                'modified_time': mod,
+                'mtime_ns': int(mod.timestamp()) * 1_000_000_000,
                 'file_size': size,
                 'scan_folder':'recent_files'
             }
@@ -0,0 +1,48 @@
+"""
+Adaptive rescan intervals per scan root.
+
+Each scan records, per root, how long the walk took and how many files it found changed.
+The changes found by a scan happened since the previous scan of that root, so the recent
+history gives a change rate; a root is rescanned about every RESCAN_TARGET_CHANGES changes,
+never more often than its scan cost allows and never more than twice as late as last time.
+"""
+
+import datetime
+from typing import NamedTuple, Optional
+
+MIN_RESCAN_SECONDS = 15 * 60
+MAX_RESCAN_SECONDS = 7 * 24 * 60 * 60
+# Changes a rescan should typically find
+RESCAN_TARGET_CHANGES = 25
+# A root is not rescanned sooner than this many times its last scan duration
+RESCAN_COST_FACTOR = 100
+# Recent scans per root the change rate is estimated from
+RESCAN_HISTORY_SCANS = 10
+
+
+class RootScanRecord(NamedTuple):
+    start_time: datetime.datetime
+    duration_seconds: float
+    files_changed: int
+
+
+def rescan_interval(history: list[RootScanRecord]) -> float:
+    """Seconds until a root should be rescanned, given its recent scans oldest first."""
+    if len(history) < 2:
+        return MIN_RESCAN_SECONDS
+    # The first scan's changes happened before the history starts
+    span = (history[-1].start_time - history[0].start_time).total_seconds()
+    changes = sum(record.files_changed for record in history[1:])
+    last_gap = max((history[-1].start_time - history[-2].start_time).total_seconds(), MIN_RESCAN_SECONDS)
+
+    interval = last_gap * 2 if changes == 0 else span / changes * RESCAN_TARGET_CHANGES
+    interval = min(interval, last_gap * 2)
+    interval = max(interval, history[-1].duration_seconds * RESCAN_COST_FACTOR)
+    return min(max(interval, MIN_RESCAN_SECONDS), MAX_RESCAN_SECONDS)
+
+
+def next_scan_time(history: list[RootScanRecord]) -> Optional[datetime.datetime]:
+    """When a root is next due, or None if it was never scanned and is due now."""
+    if not history:
+        return None
+    return history[-1].start_time + datetime.timedelta(seconds=rescan_interval(history))
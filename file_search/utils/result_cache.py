@@ -0,0 +1,67 @@
+"""
+Bounded LRU cache of search results.
+Stores only the ranked file ids of a result, tagged with the data generation they were
+computed in; any write to the indexed data bumps the generation and so retires every entry.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .query_refine import normalize_terms
+
+RESULT_CACHE_SIZE = 64
+
+
+class ResultCache:
+    """LRU map of (normalized query, limit, cursor) -> ranked file ids."""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[int, list[int]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(search_term: str, limit: Optional[int], after: Optional[tuple] = None) -> tuple:
+        return tuple(normalize_terms(search_term)), limit, after
+
+    def get(self, key: tuple) -> Optional[list[int]]:
+        """Cached file ids for key, or None if missing or computed before the last data change."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, file_ids: list[int], generation: int):
+        """Store a result computed while the data generation was `generation`."""
+        with self._lock:
+            if generation != self.generation:
+                return  # The data changed while the search ran
+            self._entries[key] = (generation, file_ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Mark every cached result stale after a change to files, favorites or frecency."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'generation': self.generation,
+            }
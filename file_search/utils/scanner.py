@@ -3,42 +3,88 @@ import time
 import os
 import datetime
 import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Optional
 from PySide6.QtCore import QObject, Signal, QThreadPool, QRunnable, Slot
 from .utils import ScanInfo
-from .database import File
+from .database import PriorState, PriorStateLoader
 from .recent_files import get_recent_file_data
+from .ignore_rules import IgnoreRules
+from .walker import WorkStealingQueue, WalkedFile, init_scan_process, scan_directory, scan_subtree, unpack_files
+from .telemetry import DirectoryTimings, get_scan_telemetry
+from .write_coalescer import WriteCoalescer
+from .watcher import FolderWatcher
 # from .thread_check import print_active_threads
 
-ignored_file_types = set([
-    '.pyc',
-])
+# Changed files (or deleted paths) per batch sent to the database worker
+SCAN_CHUNK_SIZE = 5000
+# Merged batches sent but not yet written; scanner threads wait while this many are outstanding
+MAX_CHUNKS_IN_FLIGHT = 4
+# How often a scanner thread waiting for a free batch slot checks whether the scanner is shutting down
+SEND_WAIT_SECONDS = 0.5
+# How long shutdown waits for scanner threads to finish the directory they are in
+SHUTDOWN_WAIT_MS = 5000
+# Keep the index current between scans on platforms that can report file changes
+WATCH_FOLDERS = True
+# Processes scanning directory subtrees, e.g. os.cpu_count(), for trees where the scan threads
+# are bound by the GIL rather than the disk; 0 scans in the scanner threads only
+SCAN_PROCESSES = 0
+# Directories a scan process walks before handing the rest of its subtree back to the workers
+SUBTREE_DIRECTORIES = 64
+
+class RootScan:
+    """State of one scan root while its directories are scanned by several threads"""
+    def __init__(self, folder_to_scan:str, rules:IgnoreRules, load_prior_state:Optional[PriorStateLoader]):
+        self.folder_to_scan = folder_to_scan
+        self.rules = rules
+        self._load_prior_state = load_prior_state
+        self.prior:PriorState = {}  # loaded when the root folder itself is scanned, released when the root finishes
+        self.prior_loaded = False
+        self.folder_files = []  # New or changed files not yet sent in a chunk
+        self.found_paths = set()
+        self.pending_dirs = 0  # directories queued or being scanned
+        self.walked = True  # False when the root folder was not found
+        self.failed = False
+        self.files_changed = 0
+        self.busy_seconds = 0.0  # time spent scanning its directories, summed over threads
+        self.lock = threading.Lock()
+
+    def load_prior(self):
+        """Load what the index holds for this root; runs before any of its subdirectories are queued"""
+        if self.prior_loaded:
+            return
+        self.prior_loaded = True
+        if self._load_prior_state is not None:
+            self.prior = self._load_prior_state(self.folder_to_scan)
 
 
 class ScanTask(QRunnable):
-    def __init__(self, scanner, folder_path, folders_to_ignore, folder_files:list[File]):
+    def __init__(self, scanner, work_queue:WorkStealingQueue, worker:int, processes:Optional[ProcessPoolExecutor]):
         super().__init__()
         self.scanner:'FileScanner' = scanner
-        self.folder_path = folder_path
-        self.folders_to_ignore = folders_to_ignore
-        self.folder_files = folder_files
+        self.work_queue = work_queue
+        self.worker = worker
+        self.processes = processes
     
     def run(self):
-        """Execute the folder scan"""
-        self.scanner.scan_folder(self.folder_path, self.folders_to_ignore, self.folder_files)
+        """Execute directory scans until the shared queue is drained"""
+        self.scanner.scan_worker(self.work_queue, self.worker, self.processes)
 
 class ScanRecentTask(QRunnable):
-    def __init__(self, scanner, recent:list[File], ignore:list[str]):
+    def __init__(self, scanner, load_prior_state:Optional[PriorStateLoader], ignore:list[str]):
         super().__init__()
         self.scanner:'FileScanner' = scanner
-        self.recent = recent
+        self.load_prior_state = load_prior_state
         self.ignore = ignore
 
     
     def run(self):
         """Execute the folder scan"""
         try:
-            self.scanner.recent_files(self.recent, self.ignore)
+            self.scanner.recent_files(self.load_prior_state, self.ignore)
         except Exception as e:
             print(f'Error with recent files: {e}')
             print("Full traceback:")
@@ -47,16 +93,19 @@ class ScanRecentTask(QRunnable):
 class FileScanner(QObject):
     scanSignal = Signal(str)  # current_path, files_processed, total_files
     scan_error = Signal(str)               # error_message
-    batch_scan_to_send = Signal(list,list)      # batch of files to send to database worker
+    batch_scan_to_send = Signal(list,list,int)      # files, paths_to_delete, chunks merged into the batch
+    root_scan_finished = Signal(dict)   # scan_folder, start_time, duration_seconds, files_seen, files_changed
+    scan_telemetry_ready = Signal(dict)     # telemetry snapshot of a completed scan
+    rescanRequested = Signal(bool)      # scan every folder
     
     
     
     def __init__(self, parent=None):
         super().__init__(parent)
         
-        # Setup threadpool with 8 threads
+        # Setup threadpool with 8 threads, or one per scan process
         self.threadpool = QThreadPool()
-        self.threadpool.setMaxThreadCount(8)
+        self.threadpool.setMaxThreadCount(max(8, SCAN_PROCESSES))
         
         # State tracking
         self.active_tasks = 0
@@ -70,145 +119,236 @@ class FileScanner(QObject):
         self.batches_emitted = 0
         self.batches_completed = 0
         self.start_time = 0
+        self._chunks_in_flight = threading.Semaphore(MAX_CHUNKS_IN_FLIGHT)
+        # Set on shutdown: batches are dropped instead of waiting for a database worker that has stopped
+        self._stopping = threading.Event()
+        self.telemetry = get_scan_telemetry()
+        # Merges the chunks of all scan threads, the recent files task and the folder watch
+        self._coalescer = WriteCoalescer(self._send_batch)
+        self._watcher:Optional[FolderWatcher] = None
+        self._watch_key = None
+
+
+    def _count_chunk(self):
+        """Count a chunk as emitted; done before it is sent so a fast database worker can't complete it first"""
+        with self.task_lock:
+            self.batches_emitted += 1
 
+    def _send_chunk(self, files:list, paths_to_delete:list):
+        """Hand one counted chunk to the coalescer; it reaches the database worker with the next merged batch"""
+        self._coalescer.add(files, paths_to_delete)
 
-    
-    def scan_folder(self, folder_to_scan, folders_to_ignore:list[str], folder_files_prior:list[File]):
-        """
-        Main scanning function: scan one folder and emit all files in that folder at once.
-        
-        Args:
-            folder_to_scan: Path to the folder to scan
-            folders_to_ignore: List of folder paths to ignore
-        """
-        folder_files = []  # Collect all files in this folder
-        found_paths = set()
-        files_in_folder = 0
+    def _send_batch(self, files:list, paths_to_delete:list, chunks:int):
+        """Send one merged batch to the database worker, waiting while too many batches are in flight"""
+        while not self._chunks_in_flight.acquire(timeout=SEND_WAIT_SECONDS):
+            if self._stopping.is_set():
+                return
+        if self._stopping.is_set():
+            return
+        with self.task_lock:
+            in_flight = self.batches_emitted - self.batches_completed
+        self.telemetry.record_chunk_sent(in_flight)
+        self.batch_scan_to_send.emit(files, paths_to_delete, chunks)
 
-        folder_files_prior_dict = {f.file_path:f for f in folder_files_prior}
-        
-        # Normalize ignored paths for consistent comparison
-        normalized_ignored = [os.path.normpath(ignored) for ignored in folders_to_ignore]
-        
-        def is_path_ignored(path):
-            """Check if a path is within any ignored folder"""
-            normalized_path = os.path.normpath(path)
-            return any(
-                normalized_path.startswith(ignored + os.sep) or normalized_path == ignored
-                for ignored in normalized_ignored
-            )
-            
-        def is_file_type_ignored(file_path):
-            """Check if a file should be ignored based on its extension"""
-            if not ignored_file_types:
-                return False
-            
-            _, ext = os.path.splitext(file_path)
-            return ext.lower() in ignored_file_types
+    def _emit_chunk(self, files:list, paths_to_delete:list):
+        self._count_chunk()
+        self._send_chunk(files, paths_to_delete)
 
-        try:
-            if not os.path.exists(folder_to_scan):
-                print(f"Folder not found: {folder_to_scan}")
+    
+    def scan_worker(self, work_queue:WorkStealingQueue, worker:int, processes:Optional[ProcessPoolExecutor]):
+        """Process directory work units from the shared queue until every scan root is finished"""
+        while True:
+            item = work_queue.pop(worker)
+            if item is None:
+                # Nothing more can be submitted once the queue is drained; each worker may shut the pool down
+                if processes is not None:
+                    processes.shutdown(wait=False)
                 return
-            
-            print(f"Scanning folder: {folder_to_scan}")
-            
-            # Walk through the folder and collect all files
-            for root, dirs, files in os.walk(folder_to_scan, topdown=True):
-                # Skip this directory entirely if it's ignored
-                if is_path_ignored(root):
-                    dirs.clear()  # Don't recurse into subdirectories
+            root_scan, directory = item
+            try:
+                if self._stopping.is_set():
+                    # Shutting down: drain the queue without walking
                     continue
+                if directory is None:
+                    # Root with nothing to walk: only its deletions are sent
+                    self._finish_root(root_scan)
+                else:
+                    self._scan_directory(root_scan, directory, work_queue, worker, processes)
+            finally:
+                work_queue.task_done()
+
+    def _start_scan_processes(self, rules:IgnoreRules) -> Optional[ProcessPoolExecutor]:
+        """Process pool for this scan, or None when scanning in threads only"""
+        if SCAN_PROCESSES <= 0:
+            return None
+        try:
+            # Spawned rather than forked: forking a process with running Qt threads is unsafe
+            return ProcessPoolExecutor(
+                max_workers=SCAN_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_scan_process,
+                initargs=(rules,),
+            )
+        except Exception as e:
+            print(f"Error starting scan processes, scanning in threads: {e}")
+            return None
+
+    def _list_directory(
+        self, directory:str, rules:IgnoreRules, timings:DirectoryTimings, processes:Optional[ProcessPoolExecutor]
+    ) -> tuple[list[WalkedFile], list[str]]:
+        """Files and subdirectories still to scan below directory, from a scan process when there is a pool"""
+        if processes is not None:
+            try:
+                subtree = processes.submit(scan_subtree, directory, SUBTREE_DIRECTORIES).result()
+                timings.directories = subtree.timings.directories
+                timings.listing_seconds = subtree.timings.listing_seconds
+                timings.stats = subtree.timings.stats
+                return list(unpack_files(subtree.files)), subtree.subdirs
+            except BrokenProcessPool as e:
+                print(f"Scan processes failed, scanning {directory} in this thread: {e}")
+        return scan_directory(directory, rules, timings)
+
+    def _scan_directory(
+        self, root_scan:'RootScan', directory:str, work_queue:WorkStealingQueue, worker:int,
+        processes:Optional[ProcessPoolExecutor]
+    ):
+        """Scan one directory of a root, queue its subdirectories and finish the root after its last directory"""
+        folder_files = []
+        found_paths = []
+        subdirs = []
+        timings = DirectoryTimings()
+        started = time.perf_counter()
+        try:
+            if directory == root_scan.folder_to_scan:
+                root_scan.load_prior()
+            files, subdirs = self._list_directory(directory, root_scan.rules, timings, processes)
+            with root_scan.lock:
+                root_scan.pending_dirs += len(subdirs)
+            for subdir in subdirs:
+                work_queue.push(worker, (root_scan, subdir))
+
+            for file_path, file_size, mtime_ns, inode, device in files:
+                found_paths.append(file_path)
                 
-                # Remove ignored folders from dirs list
-                dirs[:] = [d for d in dirs if not is_path_ignored(os.path.join(root, d))]
-                
-                # Process each file in current directory
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    
-                    # Skip files in ignored paths (extra safety check)
-                    if is_path_ignored(file_path):
-                        print(file_path)
-                        continue
-
-                    if is_file_type_ignored(file_path):
+                try:
+                    prior = root_scan.prior.get(file_path)
+                    # A file replaced by another one can keep its mtime, but not its inode
+                    if prior is not None and mtime_ns == prior[0] and (prior[1] is None or inode == prior[1]):
                         continue
-
-                    found_paths.add(file_path)
                     
-                    try:
-                        # Get file information
-                        file_stat = os.stat(file_path)
-                        modified_time = datetime.datetime.fromtimestamp(file_stat.st_mtime)
-                        current_modified_str = modified_time.strftime('%Y-%m-%d %H:%M:%S')
-                        if file_path in folder_files_prior_dict and current_modified_str == folder_files_prior_dict[file_path].last_modified_date:
-                            continue
-                        
-                        # Add to folder's file list
-                        folder_files.append({
-                            'path': file_path,
-                            'modified_time': current_modified_str,
-                            'file_size': file_stat.st_size,
-                            'scan_folder':folder_to_scan
-                        })
-                        files_in_folder += 1
-                        
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {e}")
-                        continue
-            
-            paths_to_delete = list(set(folder_files_prior_dict).difference(found_paths))
-            # Emit entire folder's file list at once to database worker
-            if folder_files or paths_to_delete:
-
-                self.batch_scan_to_send.emit(folder_files, paths_to_delete)
-
-            with self.task_lock:
-                self.batches_emitted += 1
-                self.scanned_folders += 1
-                print(f'on folder completed, scanned folder {self.scanned_folders} of {self.total_folders}, batch completed {self.batches_completed} of {self.batches_emitted}')
-                if self.scanned_folders == self.total_folders:
-                    self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders, processing db updates'
-                    self.scanSignal.emit(self.scan_status)
-                else:
-                    self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders'
-                    self.scanSignal.emit(self.scan_status)
-            self._check_scan_complete()
-            
-                # Emit progress with last file path from this folder
-                
-
-
+                    # Add to folder's file list
+                    folder_files.append({
+                        'path': file_path,
+                        'mtime_ns': mtime_ns,
+                        'file_size': file_size,
+                        'inode': inode,
+                        'device': device,
+                        'scan_folder':root_scan.folder_to_scan
+                    })
                     
-            
-            print(f"Completed scanning {folder_to_scan}: {files_in_folder} files")
-            
+                except Exception as e:
+                    print(f"Error processing {file_path}: {e}")
+                    continue
         except Exception as e:
-            error_msg = f"Error scanning {folder_to_scan}: {e}"
+            error_msg = f"Error scanning {directory}: {e}"
             print(error_msg)
+            root_scan.failed = True
             self.scan_error.emit(error_msg)
+        finally:
+            chunk = None
+            busy_seconds = time.perf_counter() - started
+            self.telemetry.record_directory(root_scan.folder_to_scan, timings, busy_seconds, work_queue.pending)
+            with root_scan.lock:
+                root_scan.found_paths.update(found_paths)
+                root_scan.folder_files.extend(folder_files)
+                root_scan.files_changed += len(folder_files)
+                root_scan.busy_seconds += busy_seconds
+                if len(root_scan.folder_files) >= SCAN_CHUNK_SIZE:
+                    chunk = root_scan.folder_files[:SCAN_CHUNK_SIZE]
+                    del root_scan.folder_files[:SCAN_CHUNK_SIZE]
+                    # Counted before this directory is, so the root can't finish while the chunk waits to be sent
+                    self._count_chunk()
+                root_scan.pending_dirs -= 1
+                finished = root_scan.pending_dirs == 0
+            # Stream full chunks while walking instead of holding the whole root in memory
+            if chunk:
+                self._send_chunk(chunk, [])
+            if finished:
+                self._finish_root(root_scan)
+
+    def _finish_root(self, root_scan:'RootScan'):
+        """
+        Emit the remaining changes and the deletions of one scan root, after its last directory is scanned.
+        Files are only deleted when the whole root was walked without errors.
+        """
+        folder_to_scan = root_scan.folder_to_scan
+        folder_files = root_scan.folder_files
+        root_scan.folder_files = []
+        paths_to_delete = []
+        if root_scan.walked and not root_scan.failed:
+            try:
+                root_scan.load_prior()
+                paths_to_delete = list(set(root_scan.prior).difference(root_scan.found_paths))
+            except Exception as e:
+                print(f"Error loading prior state of {folder_to_scan}: {e}")
+        files_seen = len(root_scan.found_paths)
+        # The snapshot is only needed while the root is scanned
+        root_scan.prior = {}
+        root_scan.found_paths = set()
+
+        # Every chunk is counted before the root is, so the scan can't look complete in between
+        for i in range(0, max(len(folder_files), len(paths_to_delete)), SCAN_CHUNK_SIZE):
+            self._emit_chunk(folder_files[i : i + SCAN_CHUNK_SIZE], paths_to_delete[i : i + SCAN_CHUNK_SIZE])
+
+        self.telemetry.finish_root(folder_to_scan, files_seen, root_scan.files_changed + len(paths_to_delete))
+        if root_scan.walked:
+            # Recorded for the rescan scheduler
+            self.root_scan_finished.emit({
+                'scan_folder': folder_to_scan,
+                'start_time': datetime.datetime.fromtimestamp(self.start_time).strftime('%Y-%m-%d %H:%M:%S'),
+                'duration_seconds': root_scan.busy_seconds,
+                'files_seen': files_seen,
+                'files_changed': root_scan.files_changed + len(paths_to_delete),
+            })
+
+        with self.task_lock:
+            self.scanned_folders += 1
+            print(f'on folder completed, scanned folder {self.scanned_folders} of {self.total_folders}, batch completed {self.batches_completed} of {self.batches_emitted}')
+            last_folder = self.scanned_folders == self.total_folders
+            if last_folder:
+                self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders, processing db updates'
+                self.scanSignal.emit(self.scan_status)
+            else:
+                self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders'
+                self.scanSignal.emit(self.scan_status)
+        # Nothing else will merge with the chunks still pending, so don't wait for the deadline
+        if last_folder:
+            self._coalescer.flush()
+
+        self._check_scan_complete()
+
+        print(f"Completed scanning {folder_to_scan}")
     
-    def recent_files(self, recent:list[File], folders_to_ignore:list[str]):
+    def recent_files(self, load_prior_state:Optional[PriorStateLoader], folders_to_ignore:list[str]):
         new_data = get_recent_file_data()
-        old_data = {r.file_path:r for r in recent}
+        old_data = load_prior_state('recent_files') if load_prior_state is not None else {}
         print(f'recent count new: {len(new_data)}, count old: {len(old_data)}')
         
         result = []
-        new_paths = set([f.file_path for f in recent])
+        new_paths = set(old_data)
 
         for f in new_data:
             new_path = f['path']
-            new_time = f['modified_time']
+            new_time = f['mtime_ns']
             new_size = f['file_size']
             new_folder = f['scan_folder']
 
             if new_path in old_data:
-                if new_time == old_data[new_path].last_modified_date:
+                if new_time == old_data[new_path][0]:
                     continue
             result.append({
                     'path': new_path,
-                    'modified_time': new_time,
+                    'mtime_ns': new_time,
                     'file_size': new_size,
                     'scan_folder':new_folder
                 })
@@ -225,19 +365,22 @@ class FileScanner(QObject):
             delete.append(path)
 
         print(f'emit recent update: {len(result)}, delete: {len(delete)}')
-        self.batch_scan_to_send.emit(result, delete)
+        self._emit_chunk(result, delete)
 
 
         with self.task_lock:
-            self.batches_emitted += 1
             self.scanned_folders += 1
             print(f'on folder completed, scanned folder {self.scanned_folders} of {self.total_folders}, batch completed {self.batches_completed} of {self.batches_emitted}')
-            if self.scanned_folders == self.total_folders:
+            last_folder = self.scanned_folders == self.total_folders
+            if last_folder:
                 self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders, processing db updates'
                 self.scanSignal.emit(self.scan_status)
             else:
                 self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders'
                 self.scanSignal.emit(self.scan_status)
+        # Nothing else will merge with the chunks still pending, so don't wait for the deadline
+        if last_folder:
+            self._coalescer.flush()
 
 
 
@@ -245,7 +388,7 @@ class FileScanner(QObject):
     @Slot(ScanInfo)
     def run_scan(self, scan_info:ScanInfo):
         """
-        Function to run scan: gets folders from db and submits scan_folder tasks to threadpool.
+        Function to run scan: gets folders from db and submits directory scan tasks to threadpool.
         """
         try:
             if self._is_scanning:
@@ -253,33 +396,63 @@ class FileScanner(QObject):
 
             print("Starting file scan...")
             self.start_time = time.time()
+            self.telemetry.start_scan(self.threadpool.maxThreadCount())
             
             self._is_scanning = True
-            self.batches_emitted = 0
-            self.batches_completed = 0
+            # Batch counters are not reset: batches of watched changes may still be in flight
             self.scanned_folders = 0
-            self.total_folders = len(scan_info.folders_to_scan.keys())
+            self.total_folders = len(scan_info.folders_to_scan)
             self.scan_status = f'scanned {self.scanned_folders} of {self.total_folders} folders'
             self.scanSignal.emit(self.scan_status)
             
             
 
             
-            print(f"Got {len(scan_info.folders_to_scan.keys())} folders to scan, {len(scan_info.folders_to_ignore)} folders to ignore")
-            if 'recent_files' in scan_info.folders_to_scan:
-                recent = scan_info.folders_to_scan.pop('recent_files')
-                task = ScanRecentTask(self, recent,scan_info.folders_to_ignore)
+            print(f"Got {len(scan_info.folders_to_scan)} folders to scan, {len(scan_info.folders_to_ignore)} folders to ignore, {len(scan_info.ignore_patterns)} ignore patterns")
+            folders = [f for f in scan_info.folders_to_scan if f != 'recent_files']
+            if len(folders) < len(scan_info.folders_to_scan):
+                task = ScanRecentTask(self, scan_info.load_prior_state, scan_info.folders_to_ignore)
             else:
                 self.total_folders += 1
-                task = ScanRecentTask(self, [],scan_info.folders_to_ignore)
+                task = ScanRecentTask(self, None, scan_info.folders_to_ignore)
             
             self.threadpool.start(task)
             
-            print(f"Submitting {len(scan_info.folders_to_scan.keys())} folders to threadpool with {self.threadpool.maxThreadCount()} threads")
+            print(f"Submitting {len(folders)} folders to threadpool with {self.threadpool.maxThreadCount()} threads")
             
-            for folder in scan_info.folders_to_scan:
-                task = ScanTask(self, folder, scan_info.folders_to_ignore, scan_info.folders_to_scan[folder])
-                self.threadpool.start(task)
+            # Roots are split into directory work units so one huge root is scanned by every thread
+            rules = IgnoreRules(scan_info.folders_to_ignore, scan_info.ignore_patterns)
+            work_queue = WorkStealingQueue(self.threadpool.maxThreadCount())
+            root_scans = []
+            for folder in folders:
+                root_scan = RootScan(folder, rules, scan_info.load_prior_state)
+                if not os.path.exists(folder):
+                    print(f"Folder not found: {folder}")
+                    root_scan.walked = False
+                elif not rules.is_path_ignored(folder):
+                    print(f"Scanning folder: {folder}")
+                    root_scan.pending_dirs = 1
+                root_scans.append(root_scan)
+
+            if scan_info.folders_to_watch:
+                watch_roots = [
+                    folder for folder in scan_info.folders_to_watch
+                    if os.path.exists(folder) and not rules.is_path_ignored(folder)
+                ]
+            else:
+                watch_roots = [root_scan.folder_to_scan for root_scan in root_scans if root_scan.pending_dirs]
+            watch_key = (tuple(sorted(watch_roots)), tuple(scan_info.folders_to_ignore), tuple(scan_info.ignore_patterns))
+            self.watch_folders(watch_roots, rules, watch_key)
+
+            # Roots with nothing to walk are finished by a worker too, since sending their
+            # deletions may wait for the database worker and this thread receives its completions
+            for i, root_scan in enumerate(root_scans):
+                directory = root_scan.folder_to_scan if root_scan.pending_dirs else None
+                work_queue.push(i % work_queue.workers, (root_scan, directory))
+
+            processes = self._start_scan_processes(rules) if any(root_scan.pending_dirs for root_scan in root_scans) else None
+            for worker in range(work_queue.workers):
+                self.threadpool.start(ScanTask(self, work_queue, worker, processes))
             
             print("All folder scan tasks submitted to threadpool")
                 
@@ -294,18 +467,61 @@ class FileScanner(QObject):
     
     def _check_scan_complete(self):
         with self.task_lock:
-            print(f'scanned folder {self.scanned_folders} of {self.total_folders}, batch completed {self.batches_completed} of {self.batches_emitted}')
-            if self.scanned_folders == self.total_folders and self.batches_completed == self.batches_emitted:
+            if self._is_scanning and self.scanned_folders == self.total_folders and self.batches_completed >= self.batches_emitted:
                 self._is_scanning = False
                 last_scanned = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 self.scan_status = f'last scanned: {last_scanned}'
+                telemetry = self.telemetry.snapshot()
+                if telemetry['failed_batches']:
+                    self.scan_status += f", {telemetry['failed_batches']} batches failed to save"
                 self._status_text = self.scan_status
                 self.scanSignal.emit(self.scan_status)
+                self.scan_telemetry_ready.emit(telemetry)
                 # print_active_threads()
                 # Clean up thread pool after scan completion
                 # self._cleanup_threadpool()
 
 
+    def watch_folders(self, roots:list[str], rules:IgnoreRules, watch_key:tuple):
+        """Watch the scanned roots for changes; the watch is only restarted when roots or ignore rules changed"""
+        if not WATCH_FOLDERS or watch_key == self._watch_key:
+            return
+        self.stop_watching()
+        self._watch_key = watch_key
+        watcher = FolderWatcher(roots, rules, self._send_watched_changes, lambda: self.rescanRequested.emit(True))
+        try:
+            if not watcher.start():
+                print("Watching folders is not supported on this platform, relying on full scans")
+                return
+        except Exception as e:
+            print(f"Error starting folder watch: {e}")
+            return
+        print(f"Watching {len(roots)} folders for changes")
+        self._watcher = watcher
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._watcher.stop()
+        self._watcher = None
+        self._watch_key = None
+
+    def shutdown(self):
+        """Stop the folder watch and scanner threads; call before the database worker stops"""
+        self._stopping.set()
+        self.stop_watching()
+        # Wake threads waiting for a batch slot; the batches that would free one are never written now
+        self._chunks_in_flight.release(MAX_CHUNKS_IN_FLIGHT)
+        self.threadpool.clear()
+        if not self.threadpool.waitForDone(SHUTDOWN_WAIT_MS):
+            print("Warning: scanner threads did not stop in time")
+
+    def _send_watched_changes(self, files:list, paths_to_delete:list):
+        """Send coalesced changes from the folder watch through the same batches as a scan"""
+        print(f'watched changes: {len(files)} updated, {len(paths_to_delete)} deleted')
+        for i in range(0, max(len(files), len(paths_to_delete)), SCAN_CHUNK_SIZE):
+            self._emit_chunk(files[i : i + SCAN_CHUNK_SIZE], paths_to_delete[i : i + SCAN_CHUNK_SIZE])
+
     def reset_scan_state(self):
         """Reset all scan state variables for a fresh start"""
         with self.task_lock:
@@ -318,21 +534,23 @@ class FileScanner(QObject):
             self.start_time = 0
             self.scan_status = 'not scanned'
 
-    def _on_batch_completed(self, files_updated):
-        """Handle batch update completed signal"""
-        print(f"Database batch completed: {files_updated} files updated")
+    def _on_batch_completed(self, files_updated, chunks):
+        """Handle batch update completed signal; a merged batch completes every chunk it holds"""
         with self.task_lock:
-            self.batches_completed += 1
+            self.batches_completed += chunks
+        self._chunks_in_flight.release()
         self._check_scan_complete()
 
     
     def _on_db_error(self, operation, error):
-        """Handle database error signal"""
+        """Handle database error signal; a failed scan batch is recorded in the scan telemetry"""
         error_msg = f"Database error during {operation}: {error}"
         print(error_msg)
-        # Reset scanning state on error to prevent hanging
-        with self.task_lock:
-            self._is_scanning = False
+        if operation != 'batch_file_table_update':
+            # WAL checkpoints, access flushes and other worker jobs fail independently of a running scan
+            return
+        # The failed batch is still reported completed, so the scan ends through _check_scan_complete
+        self.telemetry.record_batch_failure()
         self.scan_error.emit(error_msg)
     
 
@@ -0,0 +1,209 @@
+"""
+Scan telemetry: where the time of a scan goes.
+
+Scan threads record per-root directory listing and stat latencies and the database worker
+records its commits into one shared recorder. The snapshot taken when a scan completes is
+stored in the scan_telemetry table. Comparing listing and stat time with a root's busy time
+shows whether a scan waits on the file system or on Python, and commit time, the staging,
+upsert and commit of a batch's rows, against batch time how much of ingest goes to writing them.
+"""
+
+import threading
+import time
+from typing import Optional
+
+# Bucket i holds durations in [2**(i-1), 2**i) microseconds; bucket 0 is below 1 microsecond
+HISTOGRAM_BUCKETS = 32
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency counts; not thread-safe, merge per-thread histograms instead."""
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples, in milliseconds."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(2**i / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total * 1000 / self.count if self.count else 0.0,
+            'p50_ms': self.percentile_ms(0.50),
+            'p95_ms': self.percentile_ms(0.95),
+            'p99_ms': self.percentile_ms(0.99),
+            'max_ms': self.max * 1000,
+        }
+
+
+class DirectoryTimings:
+    """Timings of one work unit, filled in by walker.scan_directory; a unit is one directory unless scanned in a process."""
+
+    def __init__(self):
+        self.directories = 1
+        self.listing_seconds = 0.0  # opening the directories and reading their entries
+        self.stats = LatencyHistogram()
+
+
+class Gauge:
+    """Samples of a level such as a queue depth."""
+
+    def __init__(self):
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        self.samples += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict:
+        return {'mean': self.total / self.samples if self.samples else 0.0, 'max': self.max}
+
+
+class RootTelemetry:
+    def __init__(self):
+        self.directories = 0
+        self.busy_seconds = 0.0
+        self.listing = LatencyHistogram()
+        self.stats = LatencyHistogram()
+        self.files_seen = 0
+        self.files_changed = 0
+        self.finished_after: Optional[float] = None  # seconds from scan start
+
+
+class ScanTelemetryRecorder:
+    """Thread-safe telemetry of the current scan, shared by the scan threads and the database worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_scan(0)
+
+    def start_scan(self, threads: int):
+        with self._lock:
+            self._started = time.perf_counter()
+            self._start_time = time.time()
+            self._threads = threads
+            self._roots: dict[str, RootTelemetry] = {}
+            self._pending_dirs = Gauge()
+            self._chunks_in_flight = Gauge()
+            self._commits = LatencyHistogram()
+            self._batches = LatencyHistogram()
+            self._rows_committed = 0
+            self._rows_batched = 0
+            self._failed_batches = 0
+
+    def _root(self, root: str) -> RootTelemetry:
+        telemetry = self._roots.get(root)
+        if telemetry is None:
+            telemetry = self._roots[root] = RootTelemetry()
+        return telemetry
+
+    def record_directory(self, root: str, timings: DirectoryTimings, busy_seconds: float, pending_dirs: int):
+        """One directory of root was scanned in busy_seconds; pending_dirs units were still queued"""
+        with self._lock:
+            telemetry = self._root(root)
+            telemetry.directories += timings.directories
+            telemetry.busy_seconds += busy_seconds
+            telemetry.listing.record(timings.listing_seconds)
+            telemetry.stats.merge(timings.stats)
+            self._pending_dirs.record(pending_dirs)
+
+    def finish_root(self, root: str, files_seen: int, files_changed: int):
+        with self._lock:
+            telemetry = self._root(root)
+            telemetry.files_seen = files_seen
+            telemetry.files_changed = files_changed
+            telemetry.finished_after = time.perf_counter() - self._started
+
+    def record_chunk_sent(self, chunks_in_flight: int):
+        with self._lock:
+            self._chunks_in_flight.record(chunks_in_flight)
+
+    def record_commit(self, seconds: float, rows: int):
+        with self._lock:
+            self._commits.record(seconds)
+            self._rows_committed += rows
+
+    def record_batch(self, seconds: float, rows: int):
+        """A whole batch_file_table_update call: deletions, then staging, upsert and commit of the rows"""
+        with self._lock:
+            self._batches.record(seconds)
+            self._rows_batched += rows
+
+    def record_batch_failure(self):
+        """A batch_file_table_update call failed; its rows were not written"""
+        with self._lock:
+            self._failed_batches += 1
+
+    def snapshot(self) -> dict:
+        """Plain-dict view of the current scan, safe to hand to QML or store as JSON"""
+        with self._lock:
+            roots = {}
+            for root, telemetry in self._roots.items():
+                elapsed = telemetry.finished_after or (time.perf_counter() - self._started)
+                io_seconds = telemetry.listing.total + telemetry.stats.total
+                roots[root] = {
+                    'directories': telemetry.directories,
+                    'files_seen': telemetry.files_seen,
+                    'files_changed': telemetry.files_changed,
+                    'finished': telemetry.finished_after is not None,
+                    'elapsed_seconds': elapsed,
+                    'files_per_second': telemetry.files_seen / elapsed if elapsed else 0.0,
+                    'busy_seconds': telemetry.busy_seconds,
+                    # Busy time not spent in the file system calls: Python work, including waiting for the GIL
+                    'python_seconds': max(telemetry.busy_seconds - io_seconds, 0.0),
+                    'listing': telemetry.listing.snapshot(),
+                    'stat': telemetry.stats.snapshot(),
+                }
+            return {
+                'start_time': self._start_time,
+                'elapsed_seconds': time.perf_counter() - self._started,
+                'threads': self._threads,
+                'roots': roots,
+                'pending_directories': self._pending_dirs.snapshot(),
+                'chunks_in_flight': self._chunks_in_flight.snapshot(),
+                'commits': self._commits.snapshot(),
+                'rows_per_commit': self._rows_committed / self._commits.count if self._commits.count else 0.0,
+                'batches': self._batches.snapshot(),
+                'rows_per_batch': self._rows_batched / self._batches.count if self._batches.count else 0.0,
+                'failed_batches': self._failed_batches,
+            }
+
+
+# Global scan telemetry instance, shared by the scan threads and the database worker
+_scan_telemetry = ScanTelemetryRecorder()
+
+
+def get_scan_telemetry():
+    """Get the global scan telemetry instance"""
+    return _scan_telemetry
@@ -0,0 +1,123 @@
+"""
+Trigram posting-list index over the lower-cased paths of the resident path catalog.
+Narrows substring searches to a candidate set of catalog slots before the final match check.
+Postings are sorted arrays of slots rather than sets of ids, so an entry costs 4 bytes and
+the index holds no Python object per file for the garbage collector to walk.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from .path_catalog import PathCatalog
+
+# Below this ratio of lengths a candidate list is probed into the longer posting by binary search
+PROBE_RATIO = 16
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the set of 3-character substrings of text."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _contains(posting: array, slot: int) -> bool:
+    i = bisect_left(posting, slot)
+    return i < len(posting) and posting[i] == slot
+
+
+class TrigramIndex:
+    """
+    In-memory map of trigram -> sorted array of catalog slots.
+
+    The index stores no paths: matches are checked against the catalog, which also drops
+    removed slots, so removals don't touch the postings. Stale entries go with the next build.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return self._slots
+
+    def clear(self):
+        """Drop all entries; the index must be rebuilt before it is used again."""
+        self._postings: dict[str, array] = {}
+        self._slots = 0  # one past the highest slot indexed
+        self.is_built = False
+
+    def build(self, rows: Iterable[tuple[int, str]]):
+        """Build the index from (slot, file_path) rows in increasing slot order."""
+        self.clear()
+        for slot, file_path in rows:
+            self.add(slot, file_path)
+        self.is_built = True
+
+    def add(self, slot: int, file_path: str):
+        """Index the path stored in slot; slots are normally added in increasing order."""
+        postings = self._postings
+        for gram in trigrams(file_path.lower()):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array('I', (slot,))
+            elif posting[-1] < slot:
+                posting.append(slot)
+            elif posting[-1] != slot:
+                # A catalog row whose path changed keeps its slot
+                i = bisect_left(posting, slot)
+                if posting[i] != slot:
+                    posting.insert(i, slot)
+        if slot >= self._slots:
+            self._slots = slot + 1
+
+    def candidates(self, terms: list[str]) -> Optional[list[int]]:
+        """
+        Slots whose path contains every trigram of every term, in slot order.
+
+        Returns None when no term is 3 or more characters long and the index cannot narrow the search.
+        """
+        grams = set()
+        for term in terms:
+            grams.update(trigrams(term.lower()))
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(g) for g in grams), key=lambda p: 0 if p is None else len(p))
+        if postings[0] is None:
+            return []
+
+        matched = postings[0]
+        for posting in postings[1:]:
+            if not matched:
+                break
+            if len(matched) * PROBE_RATIO < len(posting):
+                matched = [slot for slot in matched if _contains(posting, slot)]
+            else:
+                matched = sorted(set(matched).intersection(posting))
+        return list(matched)
+
+    def search(self, terms: list[str], catalog: PathCatalog, max_candidates: int) -> Optional[list[int]]:
+        """
+        Slots of live catalog paths that contain every term (case-insensitive).
+
+        Returns None when no term is long enough to use the index, or when more than
+        max_candidates slots remain after the trigram filter and a scan is cheaper than
+        checking them all.
+        """
+        matched = self.candidates(terms)
+        if matched is None or len(matched) > max_candidates:
+            return None
+
+        lowered_terms = [t.lower() for t in terms]
+        slots = []
+        for slot in matched:
+            if not catalog.is_live(slot):
+                continue
+            lowered = catalog.path(slot).lower()
+            if all(t in lowered for t in lowered_terms):
+                slots.append(slot)
+        return slots
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the index."""
+        postings = self._postings
+        return sys.getsizeof(postings) + sum(map(sys.getsizeof, postings)) + sum(map(sys.getsizeof, postings.values()))
@@ -1,12 +1,40 @@
 import datetime
-from dataclasses import dataclass
-from .database import File
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+from .database import PriorStateLoader
 
 
 @dataclass
 class ScanInfo:
-    folders_to_scan:dict[str,list[File]]
+    folders_to_scan:list[str]
     folders_to_ignore:list[str]
+    ignore_patterns:list[str] = field(default_factory=list)
+    # Every indexed root, including those not due for a rescan; these are watched for changes
+    folders_to_watch:list[str] = field(default_factory=list)
+    # Called from the scan threads to read each root's prior state as its scan starts
+    load_prior_state:Optional[PriorStateLoader] = None
+
+
+class GenerationCounter:
+    """Thread-safe counter used to tell the newest request apart from superseded ones."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        """Start a new generation and return its number."""
+        with self._lock:
+            self._value += 1
+            return self._value
+
+    @property
+    def current(self) -> int:
+        return self._value
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self._value
 
 
 def format_file_size(size_in_bytes):
@@ -0,0 +1,458 @@
+"""
+Live watch of the scanned folders between full scans.
+A platform backend reports changed paths (inotify on Linux, ReadDirectoryChangesW on Windows);
+changes are coalesced until the folders go quiet and then resolved into the same
+(files, paths_to_delete) batches a scan sends to the database worker.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from .ignore_rules import IgnoreRules
+from .walker import WalkedFile, walk_files
+
+# Changes are sent once no event arrived for this long...
+WATCH_QUIET_SECONDS = 0.5
+# ...or once the oldest unsent change is this old, even while events keep coming
+WATCH_MAX_DELAY_SECONDS = 5.0
+
+# Change kinds reported by the backends
+CHANGED = 'changed'
+CREATED = 'created'
+REMOVED = 'removed'
+
+ChangeCallback = Callable[[str, str], None]  # path, change kind
+
+
+class WatchBackend(ABC):
+    """
+    Change notifications for a set of root folders.
+
+    Backends run their own threads and call on_change(path, kind) for every changed path
+    below the roots, and on_overflow() when the OS dropped events.
+    """
+
+    def __init__(self, on_change: ChangeCallback, on_overflow: Callable[[], None], rules: IgnoreRules):
+        self.on_change = on_change
+        self.on_overflow = on_overflow
+        self.rules = rules
+
+    @abstractmethod
+    def start(self, roots: list[str]):
+        """Start watching roots and their subfolders"""
+
+    @abstractmethod
+    def stop(self):
+        """Stop watching and end the backend's threads"""
+
+
+# inotify(7) event flags
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+_INOTIFY_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+_INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+_INOTIFY_READ_SIZE = 64 * 1024
+_POLL_MS = 200
+
+
+class InotifyBackend(WatchBackend):
+    """
+    Linux backend. inotify watches single directories, so every folder below the roots that
+    the ignore rules keep gets its own watch, and folders created or moved in are added as they appear.
+    """
+
+    def start(self, roots: list[str]):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._wds: dict[int, str] = {}  # watch descriptor -> directory, only used by the watch thread
+        self._limit_reached = False
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(roots,), name='inotify watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(timeout=1)
+
+    def _run(self, roots: list[str]):
+        try:
+            for root in roots:
+                self._add_tree(root)
+            poller = select.poll()
+            poller.register(self._fd, select.POLLIN)
+            while not self._stopping.is_set():
+                if not poller.poll(_POLL_MS):
+                    continue
+                try:
+                    data = os.read(self._fd, _INOTIFY_READ_SIZE)
+                except BlockingIOError:
+                    continue
+                self._dispatch(data)
+        except Exception as e:
+            print(f"Error watching folders: {e}")
+        finally:
+            os.close(self._fd)
+
+    def _add_tree(self, folder: str):
+        """Watch folder and every folder below it that the ignore rules keep"""
+        stack = [folder]
+        while stack and not self._stopping.is_set():
+            directory = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _INOTIFY_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 28 and not self._limit_reached:  # ENOSPC: out of watches
+                    self._limit_reached = True
+                    print("inotify watch limit reached; folders beyond it are only updated by full scans")
+                continue
+            self._wds[wd] = directory
+            folder_node = self.rules.folder_node(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and not self.rules.is_entry_ignored(
+                            folder_node, entry.name, entry.path
+                        ):
+                            stack.append(entry.path)
+            except OSError:
+                pass
+
+    def _remove_tree(self, folder: str):
+        """Drop the watches of a folder that was moved away; its watches would keep reporting the old path"""
+        prefix = os.path.join(folder, '')
+        for wd, directory in list(self._wds.items()):
+            if directory == folder or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._wds[wd]
+
+    def _dispatch(self, data: bytes):
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _cookie, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            start = offset + _INOTIFY_EVENT.size
+            name = data[start : start + length].rstrip(b'\0')
+            offset = start + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.on_overflow()
+                continue
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            directory = self._wds.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    if self.rules.is_entry_ignored(self.rules.folder_node(directory), os.fsdecode(name), path):
+                        continue
+                    self._add_tree(path)
+                    self.on_change(path, CREATED)
+                elif mask & IN_MOVED_FROM:
+                    self._remove_tree(path)
+                    self.on_change(path, REMOVED)
+                elif mask & IN_DELETE:
+                    self.on_change(path, REMOVED)
+                continue
+
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self.on_change(path, REMOVED)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self.on_change(path, CREATED)
+            else:
+                self.on_change(path, CHANGED)
+
+
+# ReadDirectoryChangesW constants
+FILE_LIST_DIRECTORY = 0x0001
+FILE_SHARE_ALL = 0x0001 | 0x0002 | 0x0004  # read, write, delete
+OPEN_EXISTING = 3
+FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+_NOTIFY_FILTER = 0x0001 | 0x0002 | 0x0008 | 0x0010  # file name, dir name, size, last write
+_NOTIFY_ACTIONS = {
+    1: CREATED,  # FILE_ACTION_ADDED
+    2: REMOVED,  # FILE_ACTION_REMOVED
+    3: CHANGED,  # FILE_ACTION_MODIFIED
+    4: REMOVED,  # FILE_ACTION_RENAMED_OLD_NAME
+    5: CREATED,  # FILE_ACTION_RENAMED_NEW_NAME
+}
+_NOTIFY_HEADER = struct.Struct('<III')  # next entry offset, action, file name length in bytes
+# Network shares reject larger buffers
+_NOTIFY_BUFFER_SIZE = 64 * 1024
+
+
+def _kernel32():
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)  # type: ignore
+    kernel32.CreateFileW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID, wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+    ]
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.ReadDirectoryChangesW.argtypes = [
+        wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID, wintypes.LPVOID,
+    ]
+    kernel32.ReadDirectoryChangesW.restype = wintypes.BOOL
+    kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+    kernel32.CancelIoEx.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    return kernel32
+
+
+class ReadDirectoryChangesBackend(WatchBackend):
+    """
+    Windows backend. ReadDirectoryChangesW watches a whole subtree, so each root needs one
+    handle and one blocking thread; ignored folders are filtered when changes are resolved.
+    """
+
+    def start(self, roots: list[str]):
+        self._kernel32 = _kernel32()
+        self._stopping = threading.Event()
+        self._handles: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, args=(root,), name=f'watch {root}', daemon=True) for root in roots
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            for handle in self._handles.values():
+                # Wakes the thread blocked in ReadDirectoryChangesW; it closes its own handle
+                self._kernel32.CancelIoEx(handle, None)
+
+    def _run(self, root: str):
+        kernel32 = self._kernel32
+        handle = kernel32.CreateFileW(
+            root, FILE_LIST_DIRECTORY, FILE_SHARE_ALL, None, OPEN_EXISTING, FILE_FLAG_BACKUP_SEMANTICS, None
+        )
+        if handle is None or handle == ctypes.c_void_p(-1).value:
+            print(f"Cannot watch {root}: {ctypes.WinError(ctypes.get_last_error())}")  # type: ignore
+            return
+        with self._lock:
+            if self._stopping.is_set():
+                kernel32.CloseHandle(handle)
+                return
+            self._handles[root] = handle
+
+        from ctypes import wintypes
+
+        buffer = ctypes.create_string_buffer(_NOTIFY_BUFFER_SIZE)
+        returned = wintypes.DWORD()
+        try:
+            while not self._stopping.is_set():
+                if not kernel32.ReadDirectoryChangesW(
+                    handle, buffer, len(buffer), True, _NOTIFY_FILTER, ctypes.byref(returned), None, None
+                ):
+                    if not self._stopping.is_set():
+                        print(f"Stopped watching {root}: {ctypes.WinError(ctypes.get_last_error())}")  # type: ignore
+                    return
+                if returned.value == 0:
+                    # The buffer overflowed and the changes are lost
+                    self.on_overflow()
+                    continue
+                self._dispatch(root, buffer.raw[: returned.value])
+        finally:
+            with self._lock:
+                self._handles.pop(root, None)
+            kernel32.CloseHandle(handle)
+
+    def _dispatch(self, root: str, data: bytes):
+        offset = 0
+        while True:
+            next_offset, action, length = _NOTIFY_HEADER.unpack_from(data, offset)
+            start = offset + _NOTIFY_HEADER.size
+            kind = _NOTIFY_ACTIONS.get(action)
+            if kind is not None:
+                self.on_change(os.path.join(root, data[start : start + length].decode('utf-16-le')), kind)
+            if next_offset == 0:
+                return
+            offset += next_offset
+
+
+# Watch backend per sys.platform; platforms without an entry are only updated by full scans
+WATCH_BACKENDS: dict[str, type[WatchBackend]] = {
+    'linux': InotifyBackend,
+    'win32': ReadDirectoryChangesBackend,
+}
+
+
+class ChangeCoalescer:
+    """Latest change kind per path, collected from the backend threads until the folders go quiet"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changes: dict[str, str] = {}
+        self._first = 0.0
+        self._last = 0.0
+        self._overflowed = False
+
+    def add(self, path: str, kind: str):
+        now = time.monotonic()
+        with self._lock:
+            if not self._changes:
+                self._first = now
+            self._last = now
+            # A new file that is then written to is still new
+            if not (kind == CHANGED and self._changes.get(path) == CREATED):
+                self._changes[path] = kind
+
+    def mark_overflow(self):
+        with self._lock:
+            self._overflowed = True
+
+    def take_ready(self) -> tuple[dict[str, str], bool]:
+        """Changes that are due to be sent, and whether events were lost since the last call"""
+        now = time.monotonic()
+        with self._lock:
+            if self._overflowed:
+                # A full scan replaces whatever was collected
+                self._overflowed = False
+                self._changes = {}
+                return {}, True
+            if not self._changes:
+                return {}, False
+            if now - self._last < WATCH_QUIET_SECONDS and now - self._first < WATCH_MAX_DELAY_SECONDS:
+                return {}, False
+            changes = self._changes
+            self._changes = {}
+            return changes, False
+
+
+class FolderWatcher:
+    """
+    Watches scan roots and hands coalesced changes to send(files, paths_to_delete) from its own thread.
+
+    Files below a folder that is moved out of a root stay indexed until the next full scan,
+    and rescan() is called whenever the backend lost events.
+    """
+
+    def __init__(
+        self,
+        roots: list[str],
+        rules: IgnoreRules,
+        send: Callable[[list, list], None],
+        rescan: Callable[[], None],
+    ):
+        # Longest first, so a file below nested roots belongs to the innermost one
+        self.roots = sorted(roots, key=len, reverse=True)
+        self.rules = rules
+        self._send = send
+        self._rescan = rescan
+        self._coalescer = ChangeCoalescer()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        backend_class = WATCH_BACKENDS.get(sys.platform)
+        self._backend = None if backend_class is None else backend_class(
+            self._coalescer.add, self._coalescer.mark_overflow, rules
+        )
+
+    def start(self) -> bool:
+        """Start watching; returns False where the platform has no watch backend"""
+        if self._backend is None:
+            return False
+        self._backend.start(self.roots)
+        self._thread = threading.Thread(target=self._run, name='watch flush', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stopping.set()
+        if self._backend is not None and self._thread is not None:
+            self._backend.stop()
+
+    def _run(self):
+        while not self._stopping.wait(WATCH_QUIET_SECONDS / 2):
+            changes, overflowed = self._coalescer.take_ready()
+            if overflowed:
+                print("Folder watch lost events, requesting a full scan")
+                self._rescan()
+                continue
+            if not changes:
+                continue
+            try:
+                files, paths_to_delete = self.resolve(changes)
+                if files or paths_to_delete:
+                    self._send(files, paths_to_delete)
+            except Exception as e:
+                print(f"Error sending watched changes: {e}")
+
+    def root_of(self, path: str) -> Optional[str]:
+        """Scan root that path belongs to, or None if it is outside every root"""
+        folded = os.path.normcase(path)
+        for root in self.roots:
+            root_folded = os.path.normcase(root)
+            if folded == root_folded or folded.startswith(os.path.join(root_folded, '')):
+                return root
+        return None
+
+    def resolve(self, changes: dict[str, str]) -> tuple[list[dict], list[str]]:
+        """Turn coalesced changes into file records to upsert and paths to delete, as a scan would"""
+        files: dict[str, dict] = {}
+        paths_to_delete = []
+        for path, kind in changes.items():
+            root = self.root_of(path)
+            if root is None or self.rules.is_path_ignored_below(root, path):
+                continue
+            if kind == REMOVED:
+                paths_to_delete.append(path)
+                continue
+            try:
+                file_stat = os.stat(path)
+            except FileNotFoundError:
+                paths_to_delete.append(path)
+                continue
+            except OSError as e:
+                print(f"Error processing {path}: {e}")
+                continue
+            if stat.S_ISDIR(file_stat.st_mode):
+                # Only new folders are walked; changes inside existing ones arrive as their own events
+                if kind == CREATED and not os.path.islink(path):
+                    for walked in walk_files(path, self.rules):
+                        files[walked.path] = self._record(walked, root)
+                continue
+            files[path] = self._record(
+                WalkedFile(path, file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino or None, file_stat.st_dev or None),
+                root,
+            )
+        return list(files.values()), paths_to_delete
+
+    @staticmethod
+    def _record(walked: WalkedFile, scan_folder: str) -> dict:
+        return {
+            'path': walked.path,
+            'mtime_ns': walked.mtime_ns,
+            'file_size': walked.file_size,
+            'inode': walked.inode,
+            'device': walked.device,
+            'scan_folder': scan_folder,
+        }
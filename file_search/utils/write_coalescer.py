@@ -0,0 +1,81 @@
+"""
+Coalescing of scan writes in front of the database worker.
+Scanner threads, the recent files task and the folder watch each produce small chunks of
+changes; merging them means a scan of many small roots costs a few transactions instead of
+one per root. A merged batch goes out once it holds COALESCE_MAX_ROWS rows or once its
+oldest chunk has waited COALESCE_MAX_DELAY_SECONDS, and carries the number of chunks it
+holds so completions can be counted exactly.
+"""
+
+import threading
+from typing import Callable, Optional
+
+# Rows (upserts plus deletions) that make a merged batch go out at once
+COALESCE_MAX_ROWS = 5000
+# Longest a chunk waits for others to merge with
+COALESCE_MAX_DELAY_SECONDS = 0.25
+
+SendBatch = Callable[[list, list, int], None]  # files, paths_to_delete, chunks
+
+
+class WriteCoalescer:
+    """
+    Merges (files, paths_to_delete) chunks from any thread into batches for send().
+
+    A later chunk wins over an earlier one for the same path, so merging never reorders an
+    upsert and a deletion of one file. Batches are sent in the order they were merged, and
+    send() may block (backpressure); chunks added meanwhile wait for it.
+    """
+
+    def __init__(
+        self,
+        send: SendBatch,
+        max_rows: int = COALESCE_MAX_ROWS,
+        max_delay: float = COALESCE_MAX_DELAY_SECONDS,
+    ):
+        self._send = send
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        # Held while a batch is taken and sent, so batches reach the database worker in order
+        self._lock = threading.Lock()
+        self._files: dict[str, dict] = {}
+        self._deletes: dict[str, None] = {}  # insertion ordered set
+        self._chunks = 0
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, files: list, paths_to_delete: list):
+        """Merge one chunk; it is sent with the next batch"""
+        with self._lock:
+            # Within a chunk deletions come before upserts, as in batch_file_table_update
+            for path in paths_to_delete:
+                self._files.pop(path, None)
+                self._deletes[path] = None
+            for file_info in files:
+                self._deletes.pop(file_info['path'], None)
+                self._files[file_info['path']] = file_info
+            self._chunks += 1
+            if len(self._files) + len(self._deletes) >= self.max_rows:
+                self._send_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Send whatever is pending now, e.g. once a scan has walked its last root"""
+        with self._lock:
+            self._send_pending()
+
+    def _send_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._chunks:
+            return
+        files = list(self._files.values())
+        paths_to_delete = list(self._deletes)
+        chunks = self._chunks
+        self._files = {}
+        self._deletes = {}
+        self._chunks = 0
+        self._send(files, paths_to_delete, chunks)